@@ -0,0 +1 @@
+# Ingestion benchmarks: python -m bench --help
@@ -0,0 +1,52 @@
+import argparse
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+from bench.corpus import CORPUS_DIR, sites, record, synthesize
+from bench.runner import SCENARIOS, run, save, compare
+
+# python -m bench synth                                   # offline corpus
+# python -m bench record https://site/rss.xml ...          # real pages (needs network)
+# python -m bench run --save bench/baseline.json
+# python -m bench run --compare bench/baseline.json       # exit 1 on regression
+# The ingest scenario needs BENCH_DATABASE_URL (a throwaway database, never the app's)
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Extraction / ingestion benchmarks")
+    parser.add_argument("--corpus", default=CORPUS_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rec = commands.add_parser("record", help="record real feeds and their pages into the corpus")
+    rec.add_argument("feeds", nargs="+")
+    rec.add_argument("--max-items", type=int, default=50)
+
+    syn = commands.add_parser("synth", help="generate a synthetic Turkish news corpus")
+    syn.add_argument("--sites", type=int, default=6)
+    syn.add_argument("--items", type=int, default=40)
+
+    bench = commands.add_parser("run", help="run the benchmarks")
+    bench.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma separated subset of {','.join(SCENARIOS)}")
+    bench.add_argument("--save", help="write results as a JSON baseline")
+    bench.add_argument("--compare", help="compare against a JSON baseline")
+    bench.add_argument("--tolerance", type=float, default=0.10, help="allowed regression per metric (default 10%%)")
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.feeds, args.corpus, args.max_items)
+    elif args.command == "synth":
+        synthesize(args.corpus, args.sites, args.items)
+    else:
+        if not sites(args.corpus):
+            print(f"No corpus in {args.corpus}; run 'python -m bench synth' or 'python -m bench record ...' first")
+            sys.exit(2)
+        results = run([s.strip() for s in args.scenarios.split(",") if s.strip()], args.corpus)
+        if args.save:
+            save(results, args.save)
+        if args.compare and not compare(results, args.compare, args.tolerance):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import os
+import random
+import re
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urljoin
+from xml.sax.saxutils import escape
+
+import httpx
+
+from etl.feed_reader import FeedReader
+
+# Benchmark corpus: one directory per site
+#   corpus/<site>/feed.xml     links rewritten to BASE_PLACEHOLDER/<site>/p/<n>.html
+#   corpus/<site>/p/<n>.html   raw page bytes as served by the site
+# The bench server swaps the placeholder for its own address, so the same corpus
+# works on any port.
+CORPUS_DIR = os.getenv("BENCH_CORPUS_DIR", os.path.join(os.path.dirname(__file__), "corpus"))
+BASE_PLACEHOLDER = "__BENCH_BASE__"
+
+def sites(corpus_dir: str = CORPUS_DIR) -> list[str]:
+    if not os.path.isdir(corpus_dir):
+        return []
+    return sorted(d for d in os.listdir(corpus_dir) if os.path.isfile(os.path.join(corpus_dir, d, "feed.xml")))
+
+def page_paths(corpus_dir: str = CORPUS_DIR) -> list[str]:
+    paths = []
+    for site in sites(corpus_dir):
+        page_dir = os.path.join(corpus_dir, site, "p")
+        paths += [os.path.join(page_dir, name) for name in sorted(os.listdir(page_dir)) if name.endswith(".html")]
+    return paths
+
+def _write_feed(site_dir: str, site: str, items: list[tuple[str, datetime]]):
+    parts = ["<?xml version='1.0' encoding='utf-8'?><rss version='2.0'><channel>", f"<title>{escape(site)}</title>"]
+    for n, (title, pubDate) in enumerate(items):
+        parts.append(
+            f"<item><title>{escape(title)}</title>"
+            f"<link>{BASE_PLACEHOLDER}/{site}/p/{n}.html</link>"
+            f"<pubDate>{format_datetime(pubDate)}</pubDate></item>"
+        )
+    parts.append("</channel></rss>")
+    with open(os.path.join(site_dir, "feed.xml"), "w", encoding="utf-8") as f:
+        f.write("".join(parts))
+
+# ------------------------------------------------------------------
+# RECORD (real feeds, needs network)
+# ------------------------------------------------------------------
+def record(feed_urls: list[str], corpus_dir: str = CORPUS_DIR, max_items: int = 50):
+    """Downloads each feed and up to max_items of its pages into the corpus."""
+    with httpx.Client(headers={"User-Agent": "Mozilla/5.0"}, follow_redirects=True, timeout=20.0) as client:
+        for feed_url in feed_urls:
+            site = re.sub(r"[^a-z0-9]+", "-", httpx.URL(feed_url).host.lower()).strip("-")
+            site_dir = os.path.join(corpus_dir, site)
+            os.makedirs(os.path.join(site_dir, "p"), exist_ok=True)
+
+            reader = FeedReader()
+            resp = client.get(feed_url)
+            resp.raise_for_status()
+            entries = (reader.feed(resp.content) + reader.close())[:max_items]
+
+            items = []
+            for item in entries:
+                try:
+                    page = client.get(urljoin(feed_url, item["link"]))
+                    page.raise_for_status()
+                except httpx.HTTPError as e:
+                    print(f"  skipped {item['link']}: {e}")
+                    continue
+                with open(os.path.join(site_dir, "p", f"{len(items)}.html"), "wb") as f:
+                    f.write(page.content)
+                items.append((item["title"], item["pubDate"].replace(tzinfo=timezone.utc)))
+            _write_feed(site_dir, site, items)
+            print(f"Recorded {len(items)} pages from {feed_url} -> {site_dir}")
+
+# ------------------------------------------------------------------
+# SYNTHESIZE (offline stand-in with the same shape as our sources)
+# ------------------------------------------------------------------
+WORDS = (
+    "ankara istanbul izmir belediye bakan açıkladı ekonomi dolar enflasyon merkez bankası faiz "
+    "seçim meclis milletvekili öğrenci üniversite sınav meteoroloji yağmur uyarı deprem afad "
+    "hastane sağlık trafik kaza polis mahkeme karar futbol galatasaray fenerbahçe beşiktaş maç "
+    "gol transfer teknoloji yapay zeka yatırım ihracat ithalat borsa altın akaryakıt zam vatandaş"
+).split()
+
+# Container styles seen on Turkish news sites; each synthetic site sticks to one
+LAYOUTS = [
+    "<article class='haber'>{body}</article>",
+    "<div class='news-detail'>{body}</div>",
+    "<div id='article-body'>{body}</div>",
+    "<section class='post-body col-8'>{body}</section>",
+    "<main><div class='entry-content'>{body}</div></main>",
+    "<div class='wrapper'><div id='content' class='detay'>{body}</div></div>",
+]
+
+CHROME_TOP = (
+    "<header class='site-header'><nav><ul>{menu}</ul></nav></header>"
+    "<div class='banner-top'><p>Reklam alanı reklam alanı reklam alanı burada</p></div>"
+)
+CHROME_BOTTOM = (
+    "<div class='related-news'><ul>{related}</ul></div>"
+    "<div class='social-share'><p>Paylaş: Facebook Twitter WhatsApp</p></div>"
+    "<footer><p>Tüm hakları saklıdır. Haber kaynağı gösterilmeden kullanılamaz.</p></footer>"
+)
+
+def _sentence(rng: random.Random, n: int) -> str:
+    words = [rng.choice(WORDS) for _ in range(n)]
+    return " ".join(words).capitalize() + "."
+
+def _page(rng: random.Random, layout: str, title: str, paragraphs: int) -> str:
+    body = [f"<h1>{escape(title)}</h1>", f"<p class='date-info'>{rng.randint(1, 28):02d}.11.2025 {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}</p>"]
+    for i in range(paragraphs):
+        body.append(f"<p>{_sentence(rng, rng.randint(12, 40))} <b>{_sentence(rng, 4)}</b> {_sentence(rng, rng.randint(8, 20))}</p>")
+        if i == 1:
+            body.append(f"<img src='/img/{rng.randint(0, 999)}.jpg' alt='{escape(title)}'>")
+        if i == 3:
+            body.append(f"<h2>{_sentence(rng, 6)}</h2>")
+        if i == 4:
+            body.append("<div class='taboola'><p>İlginizi çekebilir: diğer haberler ve daha fazlası</p></div>")
+    menu = "".join(f"<li><a href='/k/{w}'>{w.capitalize()} haberleri ve son dakika</a></li>" for w in rng.sample(WORDS, 12))
+    related = "".join(f"<li><a href='/h/{i}'>{_sentence(rng, 8)}</a></li>" for i in range(8))
+    scripts = "".join(f"<script>window.__d{i}={{k:'{'x' * rng.randint(200, 2000)}'}};</script>" for i in range(6))
+    return (
+        f"<!DOCTYPE html><html lang='tr'><head><meta charset='utf-8'><title>{escape(title)}</title>{scripts}</head><body>"
+        + CHROME_TOP.format(menu=menu)
+        + layout.format(body="".join(body))
+        + CHROME_BOTTOM.format(related=related)
+        + "</body></html>"
+    )
+
+def synthesize(corpus_dir: str = CORPUS_DIR, site_count: int = 6, items_per_site: int = 40, seed: int = 1):
+    """Deterministic Turkish-news-like corpus for when no recorded one is available."""
+    rng = random.Random(seed)
+    started = datetime(2025, 11, 1, 8, 0, tzinfo=timezone(timedelta(hours=3)))
+    for s in range(site_count):
+        site = f"synth-{s}"
+        site_dir = os.path.join(corpus_dir, site)
+        os.makedirs(os.path.join(site_dir, "p"), exist_ok=True)
+        layout = LAYOUTS[s % len(LAYOUTS)]
+
+        items = []
+        for n in range(items_per_site):
+            title = _sentence(rng, rng.randint(5, 10))[:-1]
+            with open(os.path.join(site_dir, "p", f"{n}.html"), "w", encoding="utf-8") as f:
+                f.write(_page(rng, layout, title, rng.randint(4, 18)))
+            items.append((title, started + timedelta(minutes=7 * n)))
+        _write_feed(site_dir, site, items)
+    print(f"Synthesized {site_count} sites x {items_per_site} pages in {corpus_dir}")
@@ -0,0 +1,215 @@
+import contextlib
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.corpus import CORPUS_DIR, sites, page_paths
+
+# Every scenario runs in a fresh (spawned) process so peak RSS and CPU time
+# belong to that scenario alone (CPU spent in the extractor pool's processes is
+# not included in cpu_ms_per_item). Metrics per scenario:
+#   items, seconds, items_per_sec, cpu_ms_per_item, peak_rss_mb, db_roundtrips_per_item
+SCENARIOS = ["extract_bs4", "extract_lxml", "fetch", "ingest"]
+# Metrics where bigger is better; everything else is lower-is-better
+HIGHER_IS_BETTER = {"items_per_sec"}
+# "ingest" writes sources/articles/jobs, and a summarizer on the app's database would
+# pick the jobs up (NOTIFY) before cleanup. So it only runs against a database of its own.
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL")
+
+class Meter:
+    """Wall time, CPU time and (optionally) SQL statements sent to the DB over a block."""
+    def __init__(self, count_queries: bool = False):
+        self.queries = 0
+        self._engine = None
+        if count_queries:
+            from sqlalchemy import event
+            from model.base import engine
+            self._engine = engine
+            event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.queries += 1
+
+    def __enter__(self):
+        self.queries = 0
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self._wall
+        self.cpu_seconds = time.process_time() - self._cpu
+        if self._engine is not None:
+            from sqlalchemy import event
+            event.remove(self._engine, "before_cursor_execute", self._count)
+
+    def result(self, items: int) -> dict:
+        per_item = max(items, 1)
+        result = {
+            "items": items,
+            "seconds": round(self.seconds, 3),
+            "items_per_sec": round(items / self.seconds, 2) if self.seconds else 0.0,
+            "cpu_ms_per_item": round(self.cpu_seconds / per_item * 1000, 3),
+            # ru_maxrss is in KB on Linux
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        }
+        if self._engine is not None:
+            result["db_roundtrips_per_item"] = round(self.queries / per_item, 3)
+        return result
+
+# ------------------------------------------------------------------
+# SCENARIOS (each runs inside its own process)
+# ------------------------------------------------------------------
+def bench_extract(engine: str, corpus_dir: str, base: str) -> dict:
+    """Parse + filter only: pages are read into memory before the clock starts."""
+    from etl.extractor import extract_article_content
+
+    pages = []
+    for path in page_paths(corpus_dir):
+        with open(path, "rb") as f:
+            pages.append(f.read())
+    with Meter() as meter:
+        for content in pages:
+            extract_article_content(content, "", engine=engine)
+    return meter.result(len(pages))
+
+def bench_fetch(corpus_dir: str, base: str) -> dict:
+    """fetch_and_process_article_content over every page, FEED_ITEM_CONCURRENCY at a time."""
+    from etl.fetcher import fetch_and_process_article_content, FEED_ITEM_CONCURRENCY
+
+    urls = []
+    for site in sites(corpus_dir):
+        names = os.listdir(os.path.join(corpus_dir, site, "p"))
+        urls += [f"{base}/{site}/p/{name}" for name in sorted(names) if name.endswith(".html")]
+    with Meter() as meter:
+        with ThreadPoolExecutor(max_workers=max(1, FEED_ITEM_CONCURRENCY)) as pool:
+            list(pool.map(fetch_and_process_article_content, urls))
+    return meter.result(len(urls))
+
+class _NoImages:
+    def submit(self, *args, **kwargs):
+        pass
+
+def bench_ingest(corpus_dir: str, base: str) -> dict:
+    """
+    processSource for every corpus feed against BENCH_DATABASE_URL (see _use_bench_database).
+    Bench sources/articles/jobs are removed afterwards; images are not downloaded.
+    """
+    from init_pg import init_db
+    init_db()
+    import etl.fetcher as fetcher
+    from model.base import ConfigSessionLocal
+    from model.source import Source
+    from model.article import Article
+    from model.job import Job
+
+    fetcher.imagePipeline = _NoImages()
+    tag = f"bench-{os.getpid()}"
+
+    db = ConfigSessionLocal()
+    created = []
+    try:
+        for site in sites(corpus_dir):
+            source = Source(name=f"{tag}-{site}", url=f"{base}/{site}/feed.xml", category="Bench", language="tr")
+            db.add(source)
+            db.commit()
+            created.append((source.id, source.url, source.name))
+
+        with Meter(count_queries=True) as meter:
+            saved = sum(fetcher.processSource(*args) or 0 for args in created)
+        return meter.result(saved)
+    finally:
+        db.rollback()
+        db.query(Job).filter(Job.articleUrl.like(f"{base}/%")).delete(synchronize_session=False)
+        db.query(Article).filter(Article.url.like(f"{base}/%")).delete(synchronize_session=False)
+        db.query(Source).filter(Source.name.like(f"{tag}-%")).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+def _use_bench_database():
+    """Points model.base at BENCH_DATABASE_URL. Must run before anything imports it."""
+    from dotenv import load_dotenv
+    load_dotenv()
+    if not BENCH_DATABASE_URL:
+        raise RuntimeError("set BENCH_DATABASE_URL to a separate database to run ingest")
+    if BENCH_DATABASE_URL == os.getenv("DATABASE_URL"):
+        raise RuntimeError("BENCH_DATABASE_URL must not be the app's DATABASE_URL")
+    if "model.base" in sys.modules:
+        raise RuntimeError("model.base was imported before the bench database was selected")
+    os.environ["DATABASE_URL"] = BENCH_DATABASE_URL
+
+def _run_scenario(name: str, corpus_dir: str, base: str) -> dict:
+    # Keep the bench's raw pages out of the real page cache
+    os.environ["PAGE_CACHE_DIR"] = tempfile.mkdtemp(prefix="bench-pages-")
+    if name.startswith("extract_"):
+        scenario = lambda: bench_extract(name.split("_", 1)[1], corpus_dir, base)
+    elif name == "fetch":
+        scenario = lambda: bench_fetch(corpus_dir, base)
+    elif name == "ingest":
+        _use_bench_database()
+        scenario = lambda: bench_ingest(corpus_dir, base)
+    else:
+        raise ValueError(f"Unknown scenario {name}")
+
+    from etl.extract_pool import extractPool
+    try:
+        # The fetcher's per-item prints would drown the report (BENCH_VERBOSE=1 keeps them)
+        if os.getenv("BENCH_VERBOSE"):
+            return scenario()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            return scenario()
+    finally:
+        extractPool.stop()
+
+def run(scenarios: list[str], corpus_dir: str = CORPUS_DIR) -> dict:
+    from bench.server import BenchServer
+
+    results = {}
+    ctx = multiprocessing.get_context("spawn")
+    with BenchServer(corpus_dir) as base:
+        for name in scenarios:
+            print(f"Running {name}...")
+            with ctx.Pool(1) as pool:
+                try:
+                    results[name] = pool.apply(_run_scenario, (name, corpus_dir, base))
+                except Exception as e:
+                    print(f"  {name} failed: {e}")
+                    continue
+            print("  " + ", ".join(f"{k}={v}" for k, v in results[name].items()))
+    return results
+
+# ------------------------------------------------------------------
+# BASELINES
+# ------------------------------------------------------------------
+def save(results: dict, path: str):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"Saved results to {path}")
+
+def compare(results: dict, baseline_path: str, tolerance: float) -> bool:
+    """Prints per-metric change vs a saved baseline. Returns: False if any metric regressed more than tolerance."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    ok = True
+    for name, metrics in results.items():
+        if name not in baseline:
+            continue
+        print(f"{name}:")
+        for metric, value in metrics.items():
+            before = baseline[name].get(metric)
+            if metric in ("items", "seconds") or not before:
+                continue
+            change = (value - before) / before
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = ""
+            if worse > tolerance:
+                flag = "  <-- REGRESSION"
+                ok = False
+            print(f"  {metric:24} {before:>10} -> {value:<10} ({change:+.1%}){flag}")
+    return ok
@@ -0,0 +1,69 @@
+import http.server
+import multiprocessing
+import os
+import socket
+
+from bench.corpus import CORPUS_DIR, BASE_PLACEHOLDER
+
+# Stand-in for the news sites: serves the corpus over local HTTP. It runs in its
+# own process so its CPU time doesn't show up in the measured process.
+
+# Any /img/... request gets the same blob, big enough to pass the 5KB filter
+FAKE_IMAGE = b"\xff\xd8\xff\xe0" + bytes(range(256)) * 32 + b"\xff\xd9"
+
+def _handler(corpus_dir: str, base: str):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: bytes, ctype: str):
+            self.send_response(status)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path.startswith("/img/"):
+                return self._send(200, FAKE_IMAGE, "image/jpeg")
+
+            local = os.path.normpath(os.path.join(corpus_dir, path.lstrip("/")))
+            if not local.startswith(os.path.abspath(corpus_dir)) or not os.path.isfile(local):
+                return self._send(404, b"not found", "text/plain")
+            with open(local, "rb") as f:
+                body = f.read()
+            if local.endswith(".xml"):
+                return self._send(200, body.replace(BASE_PLACEHOLDER.encode(), base.encode()), "application/rss+xml")
+            self._send(200, body, "text/html; charset=utf-8")
+    return Handler
+
+def _serve(sock: socket.socket, corpus_dir: str, base: str):
+    server = http.server.ThreadingHTTPServer(sock.getsockname(), _handler(corpus_dir, base), bind_and_activate=False)
+    server.socket = sock
+    server.serve_forever()
+
+class BenchServer:
+    """Context manager: `with BenchServer() as base:` -> "http://127.0.0.1:<port>"."""
+    def __init__(self, corpus_dir: str = CORPUS_DIR):
+        self.corpus_dir = os.path.abspath(corpus_dir)
+        self._process = None
+
+    def __enter__(self) -> str:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("127.0.0.1", 0))
+        sock.listen(128)
+        self.base = f"http://127.0.0.1:{sock.getsockname()[1]}"
+        self._process = multiprocessing.get_context("fork").Process(
+            target=_serve, args=(sock, self.corpus_dir, self.base), daemon=True
+        )
+        self._process.start()
+        sock.close()  # the child keeps its copy
+        return self.base
+
+    def __exit__(self, *exc):
+        self._process.terminate()
+        self._process.join()
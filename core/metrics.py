@@ -0,0 +1,41 @@
+import threading
+import time
+
+class Metrics:
+    """
+    Process-wide counters plus gauges computed on read, served at GET /metrics.
+    Counter names are dotted: "<area>.<what>", e.g. "extractor.selector_hit".
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, int] = {}
+        self._gauges: dict[str, callable] = {}
+        self._started = time.time()
+
+    def incr(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def get(self, name: str) -> int:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def gauge(self, name: str, fn):
+        """Registers fn() -> number, evaluated on every snapshot."""
+        with self._lock:
+            self._gauges[name] = fn
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+        values = {}
+        for name, fn in gauges.items():
+            try:
+                values[name] = fn()
+            except Exception as e:
+                print(f"Metric gauge {name} failed: {e}")
+                values[name] = None
+        return {"uptimeSeconds": round(time.time() - self._started), "counters": counters, "gauges": values}
+
+metrics = Metrics()
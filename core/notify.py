@@ -0,0 +1,66 @@
+import select
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from model.base import engine
+
+# Postgres LISTEN/NOTIFY wakeups for the queue workers. Producers NOTIFY inside
+# their transaction (Postgres delivers it on commit and folds repeats into one),
+# idle workers block on a dedicated LISTEN connection instead of polling.
+JOB_CHANNEL = "job_pending"
+IMAGE_CHANNEL = "image_pending"
+
+def notify(db: Session, channel: str):
+    """Queues a wakeup for `channel` listeners; sent when `db` commits. Does not commit."""
+    db.execute(text("SELECT pg_notify(:channel, '')"), {"channel": channel})
+
+class PgListener:
+    """
+    Dedicated autocommit connection LISTENing on some channels (outside the pool).
+    Create it before the first queue check so no NOTIFY falls in between.
+    """
+    def __init__(self, *channels: str):
+        self._channels = channels
+        self._conn = None
+        try:
+            self._connect()
+        except Exception as e:
+            print(f"LISTEN connection error: {e}")
+
+    def _connect(self):
+        raw = engine.raw_connection()
+        raw.detach()
+        conn = raw.dbapi_connection
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            for channel in self._channels:
+                cur.execute(f'LISTEN "{channel}"')
+        self._conn = conn
+
+    def wait(self, timeout: float) -> bool:
+        """Blocks until a NOTIFY arrives or timeout seconds pass. Returns: True if notified."""
+        try:
+            if self._conn is None:
+                self._connect()
+            if not self._conn.notifies:
+                select.select([self._conn], [], [], timeout)
+                self._conn.poll()
+            notified = bool(self._conn.notifies)
+            self._conn.notifies.clear()
+            return notified
+        except Exception as e:
+            # Lost connection: behave like the old sleep loop until it comes back
+            print(f"LISTEN connection error: {e}")
+            self.close()
+            time.sleep(min(timeout, 5))
+            return False
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
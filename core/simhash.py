@@ -0,0 +1,54 @@
+import hashlib
+import re
+
+# 64-bit SimHash over 3-word shingles. Copies of the same agency story (AA, DHA,
+# IHA) reworded a little by each outlet land a few bits apart.
+# For lookup the hash is split into 4 bands of 16 bits: two hashes within 3 bits
+# of each other always share at least one band exactly, so "any band equal" is
+# a complete candidate filter for SIMHASH_MAX_DISTANCE <= 3.
+SHINGLE_WORDS = 3
+BAND_COUNT = 4
+BAND_BITS = 16
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_MASK = (1 << 64) - 1
+# Bit counting trick: every hash bit gets its own 16-bit lane in one big int, so
+# summing the spread hashes counts all 64 bit positions at once.
+_LANE = 16
+_SPREAD = [sum(1 << (_LANE * j) for j in range(8) if byte >> j & 1) for byte in range(256)]
+
+def _shingles(text: str) -> set[str]:
+    # Lanes count up to 65535 shingles; longer texts are capped (plenty for a fingerprint)
+    words = _WORD.findall(text.lower())
+    if len(words) < SHINGLE_WORDS:
+        return {" ".join(words)} if words else set()
+    words = words[:60000]
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+def simhash(text: str) -> int:
+    """Returns: signed 64-bit SimHash (fits a Postgres BIGINT), or None for empty text."""
+    shingles = _shingles(text)
+    if not shingles:
+        return None
+    total = 0
+    for shingle in shingles:
+        digest = hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest()
+        # digest[7] is the lowest byte (big endian)
+        for k, byte in enumerate(reversed(digest)):
+            total += _SPREAD[byte] << (_LANE * 8 * k)
+
+    # Bit is set when more than half of the shingles have it set
+    half = len(shingles) / 2
+    lane_mask = (1 << _LANE) - 1
+    value = 0
+    for bit in range(64):
+        if (total >> (_LANE * bit)) & lane_mask > half:
+            value |= 1 << bit
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+def bands(value: int) -> list[int]:
+    unsigned = value & _MASK
+    return [(unsigned >> (BAND_BITS * i)) & ((1 << BAND_BITS) - 1) for i in range(BAND_COUNT)]
+
+def distance(a: int, b: int) -> int:
+    return bin((a ^ b) & _MASK).count("1")
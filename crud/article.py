@@ -1,10 +1,15 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import or_, update, exists
+from sqlalchemy.dialects.postgresql import insert as pgInsert
 from datetime import datetime
 from model.article import Article
 from model.image import Image
+from model.job import Job, JobStatus
 from schema.article import ArticleCreate, ArticleUpdate
 from schema.image import ImageUpdate, ImageCreate
+from core.simhash import bands
+from core.notify import notify, IMAGE_CHANNEL
+from crud.job import bulkAddJobs
 
 def getArticle(db: Session, articleId: int):
     return db.query(Article).filter(Article.id == articleId).first()
@@ -33,9 +38,12 @@ def createImage(db: Session, image: ImageCreate, articleId: int):
         originalUrl=image.originalUrl,
         analysis=image.analysis,
         tags=image.tags,
-        isAnalyzed=image.isAnalyzed
+        isAnalyzed=image.isAnalyzed,
+        contentHash=image.contentHash
     )
     db.add(dbImage)
+    if not dbImage.isAnalyzed:
+        notify(db, IMAGE_CHANNEL)
     db.commit()
     db.refresh(dbImage)
     return dbImage
@@ -43,6 +51,12 @@ def createImage(db: Session, image: ImageCreate, articleId: int):
 def getArticleByUrl(db: Session, url: str):
     return db.query(Article).filter(Article.url == url).first()
 
+def getExistingArticleUrls(db: Session, urls: list[str]) -> set[str]:
+    """Single 'WHERE url IN (...)' lookup for a batch of candidate URLs."""
+    if not urls:
+        return set()
+    return {r[0] for r in db.query(Article.url).filter(Article.url.in_(urls)).all()}
+
 def getArticles(
     db: Session, 
     skip: int = 0, 
@@ -115,6 +129,179 @@ def createArticle(db: Session, article: ArticleCreate):
     db.refresh(dbArticle)
     return dbArticle
 
+def _bandColumns(simhash: int) -> dict:
+    values = bands(simhash) if simhash is not None else [None] * 4
+    return {f"simBand{i}": value for i, value in enumerate(values)}
+
+def _hasJob(*statuses: JobStatus):
+    """EXISTS clause: the article has a summary job in one of these states."""
+    return exists().where(Job.articleUrl == Article.url, Job.status.in_([s.value for s in statuses]))
+
+def getDuplicateCandidates(db: Session, simhashes: list[int], since: datetime) -> list:
+    """
+    Canonical articles created after `since` that share at least one SimHash band
+    with any of the given hashes (one query for a whole batch). Only ones that
+    have a summary or are still going to get one: a copy linked to anything else
+    would wait forever.
+    Returns: [(id, simhash, summary)]
+    """
+    if not simhashes:
+        return []
+    bandSets = [set() for _ in range(4)]
+    for simhash in simhashes:
+        for i, value in enumerate(bands(simhash)):
+            bandSets[i].add(value)
+    bandColumns = [Article.simBand0, Article.simBand1, Article.simBand2, Article.simBand3]
+    return db.query(Article.id, Article.simhash, Article.summary).filter(
+        or_(*[column.in_(values) for column, values in zip(bandColumns, bandSets)]),
+        Article.canonicalArticleId.is_(None),
+        Article.createdAt >= since,
+        or_(Article.summary.isnot(None), _hasJob(JobStatus.PENDING, JobStatus.PROCESSING))
+    ).all()
+
+def propagateSummary(db: Session, canonicalArticleId: int, summary: str) -> int:
+    """Copies a canonical article's summary to its near-duplicates. Commits. Returns: rows updated"""
+    result = db.execute(
+        update(Article)
+        .where(Article.canonicalArticleId == canonicalArticleId)
+        .values(summary=summary, isSummarized=True, updatedAt=datetime.utcnow())
+    )
+    db.commit()
+    return result.rowcount
+
+def promoteDuplicate(db: Session, canonicalArticleId: int) -> str:
+    """
+    For a canonical article that will never get a summary (job FAILED, or deleted):
+    its oldest unsummarized near-duplicate becomes the new canonical, the others and
+    the old canonical itself are relinked to it and it gets its own summary job.
+    Copies whose own job already FAILED are never promoted again. Does not commit.
+    Returns: URL of the promoted article, or None if there was nothing waiting.
+    """
+    waiting = (
+        db.query(Article.id, Article.url)
+        .filter(
+            Article.canonicalArticleId == canonicalArticleId,
+            Article.isSummarized.isnot(True),
+            ~_hasJob(JobStatus.FAILED),
+        )
+        .order_by(Article.id.asc())
+        .first()
+    )
+    if not waiting:
+        return None
+    db.execute(update(Article).where(Article.id == waiting.id).values(canonicalArticleId=None))
+    db.execute(
+        update(Article)
+        .where(or_(Article.canonicalArticleId == canonicalArticleId, Article.id == canonicalArticleId))
+        .values(canonicalArticleId=waiting.id)
+        .execution_options(synchronize_session=False)
+    )
+    bulkAddJobs(db, [waiting.url])
+    return waiting.url
+
+def promoteDuplicateOfUrl(db: Session, canonicalUrl: str) -> str:
+    """promoteDuplicate for the article at canonicalUrl (jobs only know the URL). Commits."""
+    canonical = db.query(Article.id).filter(Article.url == canonicalUrl).scalar()
+    promoted = promoteDuplicate(db, canonical) if canonical else None
+    db.commit()
+    return promoted
+
+def promoteStrandedDuplicates(db: Session, limit: int = 100) -> list[str]:
+    """
+    Sweep for canonicals that will never get a summary (no summary, no PENDING or
+    PROCESSING job) but still have copies waiting on them, e.g. FAILED before
+    promoteDuplicate existed or while it couldn't run. Commits.
+    Returns: URLs of the promoted articles
+    """
+    duplicate = aliased(Article)
+    failedJob = exists().where(Job.articleUrl == duplicate.url, Job.status == JobStatus.FAILED.value)
+    stranded = (
+        db.query(Article.id)
+        .filter(
+            Article.canonicalArticleId.is_(None),
+            Article.summary.is_(None),
+            ~_hasJob(JobStatus.PENDING, JobStatus.PROCESSING),
+            exists().where(
+                duplicate.canonicalArticleId == Article.id,
+                duplicate.isSummarized.isnot(True),
+                ~failedJob,
+            ),
+        )
+        .limit(limit)
+        .all()
+    )
+    promoted = [url for url in (promoteDuplicate(db, row.id) for row in stranded) if url]
+    db.commit()
+    return promoted
+
+def syncDuplicateSummaries(db: Session) -> int:
+    """
+    Catches duplicates linked while their canonical was being summarized (they
+    were read as unsummarized, then committed after propagateSummary ran).
+    Commits. Returns: rows fixed
+    """
+    canonical = aliased(Article)
+    result = db.execute(
+        update(Article)
+        .where(
+            Article.canonicalArticleId == canonical.id,
+            Article.isSummarized.isnot(True),
+            canonical.isSummarized == True,
+            canonical.summary.isnot(None),
+        )
+        .values(summary=canonical.summary, isSummarized=True, updatedAt=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+def bulkCreateArticles(db: Session, articles: list[ArticleCreate]) -> dict[str, int]:
+    """
+    Inserts a batch in one 'INSERT ... ON CONFLICT (url) DO NOTHING RETURNING' statement.
+    Does not commit, so callers can enqueue jobs/images in the same transaction.
+    Returns: {url: id} for the rows actually inserted (already known URLs are skipped).
+    """
+    if not articles:
+        return {}
+    rows = [
+        {
+            "title": article.title,
+            "url": str(article.url),
+            "content": article.content,
+            "pubDate": article.pubDate,
+            "sourceName": article.sourceName,
+            "isSummarized": article.isSummarized,
+            "summary": article.summary,
+            "category": article.category,
+            "language": article.language,
+            "simhash": article.simhash,
+            "canonicalArticleId": article.canonicalArticleId,
+            **_bandColumns(article.simhash)
+        }
+        for article in articles
+    ]
+    stmt = pgInsert(Article).values(rows)\
+        .on_conflict_do_nothing(index_elements=[Article.url])\
+        .returning(Article.id, Article.url)
+    return {url: articleId for articleId, url in db.execute(stmt).all()}
+
+def getArticleContentsByUrl(db: Session, urls: list[str]) -> dict[str, tuple[int, str]]:
+    """Returns: {url: (id, content)} for the stored URLs in the batch."""
+    if not urls:
+        return {}
+    rows = db.query(Article.id, Article.url, Article.content).filter(Article.url.in_(urls)).all()
+    return {url: (articleId, content) for articleId, url, content in rows}
+
+def bulkUpdateArticleContent(db: Session, contents: dict[int, str]):
+    """One executemany UPDATE by primary key: {articleId: content}. Commits."""
+    if not contents:
+        return
+    db.execute(update(Article), [
+        {"id": articleId, "content": content, "updatedAt": datetime.utcnow()}
+        for articleId, content in contents.items()
+    ])
+    db.commit()
+
 def updateArticle(db: Session, articleId: int, articleUpdate: ArticleUpdate):
     dbArticle = getArticle(db, articleId)
     if not dbArticle:
@@ -130,6 +317,9 @@ def updateArticle(db: Session, articleId: int, articleUpdate: ArticleUpdate):
 def deleteArticle(db: Session, articleId: int):
     dbArticle = getArticle(db, articleId)
     if dbArticle:
+        # Duplicates waiting on this article's summary would wait forever otherwise
+        if not dbArticle.isSummarized:
+            promoteDuplicate(db, articleId)
         db.delete(dbArticle)
         db.commit()
     return dbArticle
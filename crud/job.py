@@ -1,51 +1,118 @@
 from sqlalchemy.orm import Session
 from model.job import Job, JobStatus
-from sqlalchemy import func
-from datetime import datetime
+from sqlalchemy import func, insert, select, update, or_
+from datetime import datetime, timedelta
+from core.notify import notify, JOB_CHANNEL
 
 def addJob(db: Session, articleUrl: str):
     job = Job(articleUrl=articleUrl, status=JobStatus.PENDING)
     db.add(job)
+    notify(db, JOB_CHANNEL)
     db.commit()
     db.refresh(job)
     return job
 
-def getNextJob(db: Session):
+def bulkAddJobs(db: Session, articleUrls: list[str]):
+    """Queues one PENDING job per URL in a single INSERT and wakes the workers on commit. Does not commit."""
+    if not articleUrls:
+        return
+    db.execute(insert(Job).values([
+        {"articleUrl": url, "status": JobStatus.PENDING.value} for url in articleUrls
+    ]))
+    notify(db, JOB_CHANNEL)
+
+def claimJobs(db: Session, limit: int = 1, workerId: str = None, leaseSeconds: float = 300) -> list[Job]:
     """
-    Atomically finds a PENDING job and marks it as PROCESSING so no other worker picks it.
+    Atomically moves up to `limit` of the oldest claimable PENDING jobs to PROCESSING,
+    leased to workerId for leaseSeconds, and returns them.
+    One UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED) RETURNING: rows another
+    worker is claiming are skipped rather than waited on, so no job is handed out twice.
     """
-    # 1. Start a transaction
+    now = datetime.utcnow()
+    pending = (
+        select(Job.id)
+        .where(Job.status == JobStatus.PENDING.value)
+        .where(or_(Job.availableAt == None, Job.availableAt <= now))
+        .order_by(Job.createdAt.asc())
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
     try:
-        # Find the first pending job ID
-        job = db.query(Job).filter(Job.status == JobStatus.PENDING).order_by(Job.createdAt.asc()).first()
-        
-        if job:
-            # 2. Mark it as PROCESSING immediately
-            job.status = JobStatus.PROCESSING
-            db.commit()
-            db.refresh(job)
-            return job
-        else:
-            return None
+        jobs = db.scalars(
+            update(Job)
+            .where(Job.id.in_(pending.scalar_subquery()))
+            .values(
+                status=JobStatus.PROCESSING.value, workerId=workerId,
+                leasedUntil=now + timedelta(seconds=leaseSeconds), updatedAt=now
+            )
+            .returning(Job)
+            .execution_options(synchronize_session=False)
+        ).all()
+        # Detached before commit so they stay loaded: callers can hand them to other threads/sessions
+        for job in jobs:
+            db.expunge(job)
+        db.commit()
     except Exception:
         db.rollback()
-        return None
+        return []
+    return sorted(jobs, key=lambda job: job.createdAt)
 
-def incrementJobRetry(db: Session, jobId: int):
-    # If failed, we likely want to set it back to PENDING (or keep it PROCESSING/FAILED?)
-    # Usually, if we retry, we keep it as PENDING so it can be picked up again?
-    # OR we keep it PROCESSING if this worker is retrying it immediately.
-    # But usually 'retry' means putting it back in queue.
-    # Let's assume we keep logic simple: update count.
-    # If the worker crashes, the job stays PROCESSING forever (Stuck Job problem).
-    # Ideally, we should set it back to PENDING after incrementing retry.
-    
+def getNextJob(db: Session, workerId: str = None, leaseSeconds: float = 300):
+    """Claims the oldest PENDING job (see claimJobs). Returns: the job or None."""
+    jobs = claimJobs(db, 1, workerId, leaseSeconds)
+    return jobs[0] if jobs else None
+
+def renewJobLease(db: Session, jobId: int, workerId: str, leaseSeconds: float) -> bool:
+    """Heartbeat. Returns: False if the job is no longer this worker's (reaped / finished)."""
+    renewed = db.query(Job).filter(
+        Job.id == jobId, Job.workerId == workerId, Job.status == JobStatus.PROCESSING.value
+    ).update({"leasedUntil": datetime.utcnow() + timedelta(seconds=leaseSeconds)}, synchronize_session=False)
+    db.commit()
+    return renewed > 0
+
+def reapExpiredJobs(db: Session, maxRetries: int, retryDelay, leaseSeconds: float) -> tuple[int, int]:
+    """
+    Jobs whose worker stopped renewing the lease (crash, deploy) count as a failed
+    attempt: back to PENDING after retryDelay(retryCount) seconds, or FAILED once
+    maxRetries is reached. PROCESSING jobs without a lease (claimed before leases
+    existed) expire leaseSeconds after their last update.
+    Returns: (number requeued, article URLs of the jobs marked FAILED)
+    """
+    now = datetime.utcnow()
+    expired = (
+        db.query(Job)
+        .filter(Job.status == JobStatus.PROCESSING.value)
+        .filter(or_(
+            Job.leasedUntil < now,
+            (Job.leasedUntil == None) & (or_(Job.updatedAt == None, Job.updatedAt < now - timedelta(seconds=leaseSeconds))),
+        ))
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    requeued, failed = 0, []
+    for job in expired:
+        job.retryCount = (job.retryCount or 0) + 1
+        job.workerId = None
+        job.leasedUntil = None
+        if job.retryCount >= maxRetries:
+            job.status = JobStatus.FAILED.value
+            failed.append(job.articleUrl)
+        else:
+            job.status = JobStatus.PENDING.value
+            job.availableAt = now + timedelta(seconds=retryDelay(job.retryCount))
+            requeued += 1
+    db.commit()
+    return requeued, failed
+
+def incrementJobRetry(db: Session, jobId: int, retryAfterSeconds: float = 0):
+    """Counts a failed attempt and puts the job back in the queue, claimable again after retryAfterSeconds."""
     job = db.query(Job).filter(Job.id == jobId).first()
     if job:
         job.retryCount += 1
-        # If we want to try again later, set to PENDING? 
-        # For this simple system, let's keep status as is (PROCESSING) 
-        # because the WORKER loop retries it immediately in the `else` block.
+        job.status = JobStatus.PENDING
+        job.workerId = None
+        job.leasedUntil = None
+        job.availableAt = datetime.utcnow() + timedelta(seconds=retryAfterSeconds)
         db.commit()
         db.refresh(job)
         return job.retryCount
@@ -55,11 +122,15 @@ def markJobFailed(db: Session, jobId: int):
     job = db.query(Job).filter(Job.id == jobId).first()
     if job:
         job.status = JobStatus.FAILED
+        job.workerId = None
+        job.leasedUntil = None
         db.commit()
 
 def markJobCompleted(db: Session, job_id: int):
     job = db.query(Job).filter(Job.id == job_id).first()
     if job:
         job.status = JobStatus.COMPLETED
+        job.workerId = None
+        job.leasedUntil = None
         job.updatedAt = datetime.utcnow()
         db.commit()
\ No newline at end of file
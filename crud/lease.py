@@ -0,0 +1,25 @@
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from model.lease import Lease
+
+def acquireLease(db: Session, name: str, owner: str, ttlSeconds: float) -> bool:
+    """
+    Takes the lease if it is free or expired, or extends it if `owner` already holds it.
+    One INSERT ... ON CONFLICT, so two instances can't both win. Returns: True if `owner` holds it now.
+    """
+    now = datetime.utcnow()
+    stmt = insert(Lease).values(name=name, owner=owner, expiresAt=now + timedelta(seconds=ttlSeconds))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Lease.name],
+        set_={"owner": stmt.excluded.owner, "expiresAt": stmt.excluded.expiresAt},
+        where=or_(Lease.expiresAt < now, Lease.owner == owner),
+    ).returning(Lease.owner)
+    won = db.execute(stmt).scalar() is not None
+    db.commit()
+    return won
+
+def releaseLease(db: Session, name: str, owner: str):
+    db.query(Lease).filter(Lease.name == name, Lease.owner == owner).delete(synchronize_session=False)
+    db.commit()
@@ -1,3 +1,5 @@
+from datetime import datetime
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from model.source import Source
 from schema.source import SourceCreate, SourceUpdate
@@ -31,6 +33,17 @@ def updateSource(db: Session, sourceId: int, sourceUpdate: SourceUpdate):
         return None
     
     updateData = sourceUpdate.model_dump(exclude_unset=True)
+    if "url" in updateData and updateData["url"] != dbSource.url:
+        # Validators and failures from the old URL mean nothing for the new one
+        dbSource.etag = None
+        dbSource.lastModified = None
+        dbSource.feedHash = None
+        dbSource.consecutiveFailures = 0
+        dbSource.nextRetryTime = None
+        dbSource.lastError = None
+    if "fetchIntervalMinutes" in updateData and updateData["fetchIntervalMinutes"] != dbSource.fetchIntervalMinutes:
+        # A new configured interval restarts adaptation from it
+        dbSource.effectiveIntervalMinutes = None
     for key, value in updateData.items():
         setattr(dbSource, key, value)
         
@@ -39,6 +52,95 @@ def updateSource(db: Session, sourceId: int, sourceUpdate: SourceUpdate):
     db.refresh(dbSource)
     return dbSource
 
+def updateSourceFeedState(db: Session, sourceId: int, etag: str, lastModified: str, feedHash: str):
+    dbSource = getSource(db, sourceId)
+    if not dbSource:
+        return None
+    dbSource.etag = etag
+    dbSource.lastModified = lastModified
+    dbSource.feedHash = feedHash
+    db.commit()
+    return dbSource
+
+def markSourceFetched(db: Session, sourceId: int, fetchedAt: datetime, effectiveIntervalMinutes: float = None):
+    dbSource = getSource(db, sourceId)
+    if not dbSource:
+        return None
+    dbSource.lastFetchTime = fetchedAt
+    if effectiveIntervalMinutes is not None:
+        dbSource.effectiveIntervalMinutes = effectiveIntervalMinutes
+    # A successful poll closes the circuit
+    dbSource.consecutiveFailures = 0
+    dbSource.nextRetryTime = None
+    dbSource.lastError = None
+    dbSource.leaseOwner = None
+    dbSource.leaseExpiresAt = None
+    db.commit()
+    return dbSource
+
+def markSourceFailed(db: Session, sourceId: int, fetchedAt: datetime, consecutiveFailures: int, nextRetryTime: datetime, lastError: str):
+    dbSource = getSource(db, sourceId)
+    if not dbSource:
+        return None
+    dbSource.lastFetchTime = fetchedAt
+    dbSource.consecutiveFailures = consecutiveFailures
+    dbSource.nextRetryTime = nextRetryTime
+    dbSource.lastError = lastError[:500] if lastError else lastError
+    dbSource.leaseOwner = None
+    dbSource.leaseExpiresAt = None
+    db.commit()
+    return dbSource
+
+def markSourceProcessingFailed(db: Session, sourceId: int, fetchedAt: datetime, nextRetryTime: datetime, lastError: str):
+    """The feed downloaded but processing it failed: releases the lease, keeps consecutiveFailures as is."""
+    dbSource = getSource(db, sourceId)
+    if not dbSource:
+        return None
+    dbSource.lastFetchTime = fetchedAt
+    dbSource.nextRetryTime = nextRetryTime
+    dbSource.lastError = lastError[:500] if lastError else lastError
+    dbSource.leaseOwner = None
+    dbSource.leaseExpiresAt = None
+    db.commit()
+    return dbSource
+
+def claimSource(db: Session, sourceId: int, owner: str, now: datetime, leaseUntil: datetime):
+    """
+    Leases an active source to `owner` unless another instance holds an unexpired
+    lease. SKIP LOCKED: a row another instance is claiming right now counts as taken.
+    Returns: the source, or None if it is taken / inactive / gone.
+    """
+    dbSource = (
+        db.query(Source)
+        .filter(Source.id == sourceId, Source.isActive == True)
+        .filter(or_(Source.leaseExpiresAt == None, Source.leaseExpiresAt < now, Source.leaseOwner == owner))
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if not dbSource:
+        db.rollback()
+        return None
+    dbSource.leaseOwner = owner
+    dbSource.leaseExpiresAt = leaseUntil
+    db.commit()
+    return dbSource
+
+def releaseSourceLease(db: Session, sourceId: int, owner: str):
+    db.query(Source).filter(Source.id == sourceId, Source.leaseOwner == owner).update(
+        {"leaseOwner": None, "leaseExpiresAt": None}, synchronize_session=False
+    )
+    db.commit()
+
+def renewSourceLeases(db: Session, sourceIds, owner: str, leaseUntil: datetime) -> int:
+    """Extends the leases `owner` still holds on these sources (long polls). Returns: rows renewed."""
+    if not sourceIds:
+        return 0
+    renewed = db.query(Source).filter(Source.id.in_(list(sourceIds)), Source.leaseOwner == owner).update(
+        {"leaseExpiresAt": leaseUntil}, synchronize_session=False
+    )
+    db.commit()
+    return renewed
+
 def deleteSource(db: Session, sourceId: int):
     dbSource = getSource(db, sourceId)
     if dbSource:
@@ -0,0 +1,12 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from model.summary_cache import SummaryCache
+
+def getCachedSummary(db: Session, key: str):
+    """Returns: the cached summary text or None."""
+    return db.query(SummaryCache.summary).filter(SummaryCache.key == key).scalar()
+
+def saveCachedSummary(db: Session, key: str, summary: str, model: str):
+    # Two workers may summarize the same text at once; the first one wins
+    db.execute(insert(SummaryCache).values(key=key, summary=summary, model=model).on_conflict_do_nothing(index_elements=[SummaryCache.key]))
+    db.commit()
@@ -0,0 +1,115 @@
+import asyncio
+
+import httpx
+
+from model.base import TodaySessionLocal
+from etl.http import AsyncHttp, hostBreaker, FeedFetchError
+from etl.url_cache import recentUrls
+from etl.feed_reader import FeedStream
+from etl.page_cache import pageCache
+from etl.selector_cache import selectorCache
+from etl.extract_pool import extractPool
+from etl.fetcher import (
+    finish_extract, load_source, filter_new_items, save_new_articles,
+    feed_request_headers, save_feed_state, FEED_ITEM_CONCURRENCY
+)
+
+# Async counterparts of etl/fetcher.py. Network I/O runs on the shared AsyncHttp
+# client; parsing goes to the extractor processes (etl/extract_pool.py) and the
+# (sync) SQLAlchemy calls to worker threads, so the event loop keeps every other
+# request moving. Images go through the shared
+# image pipeline in both modes.
+
+async def fetch_and_process_article_content_async(http: AsyncHttp, url: str) -> tuple[str, list[str]]:
+    """Async version of fetch_and_process_article_content."""
+    if not hostBreaker.allow(url):
+        print(f"Skipping {url}: host circuit open")
+        return "", []
+    try:
+        resp = await http.get(url, timeout=10.0, follow_redirects=True)
+        hostBreaker.record_response(url, resp.status_code)
+        resp.raise_for_status()
+
+        await asyncio.to_thread(pageCache.put, url, resp.content, resp.charset_encoding)
+        hint = selectorCache.get(url)
+        extracted = await extractPool.extract_async(resp.content, url, resp.charset_encoding, hint)
+        return finish_extract(url, hint, extracted)
+
+    except asyncio.CancelledError as e:
+        # Feed failed or shutting down: don't leave the host's half-open probe taken
+        hostBreaker.record_error(url, e)
+        raise
+    except Exception as e:
+        hostBreaker.record_error(url, e)
+        print(f"Error: {e}")
+        return "", []
+
+async def processSourceAsync(http: AsyncHttp, sourceId: int, sourceUrl: str, sourceName: str):
+    """Async twin of processSource: same return value, same FeedFetchError."""
+    print(f"Downloading RSS {sourceName} ({sourceUrl})...")
+
+    source_obj = await asyncio.to_thread(load_source, sourceId)
+
+    db = TodaySessionLocal()
+    stream = FeedStream(source_obj.feedHash if source_obj else None)
+    # At most FEED_ITEM_CONCURRENCY item pages of this feed in flight
+    slots = asyncio.Semaphore(max(1, FEED_ITEM_CONCURRENCY))
+    tasks = []
+
+    async def _extract(item):
+        async with slots:
+            print(f"Processing content for: {item['title']}")
+            text, image_srcs = await fetch_and_process_article_content_async(http, item["link"])
+            return (item, text, image_srcs)
+
+    async def submit(batch):
+        if not batch: return
+        for item in await asyncio.to_thread(filter_new_items, db, batch):
+            tasks.append(asyncio.create_task(_extract(item)))
+
+    try:
+        if not hostBreaker.allow(sourceUrl):
+            raise FeedFetchError(f"Host circuit open for {sourceUrl}")
+        try:
+            async with http.stream("GET", sourceUrl, headers=feed_request_headers(source_obj), timeout=60.0) as response:
+                hostBreaker.record_response(sourceUrl, response.status_code)
+                if response.status_code == 304:
+                    print(f"{sourceName} unchanged since last poll (304)")
+                    return 0
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes():
+                    await submit(stream.feed(chunk))
+                await submit(stream.close())
+                response_headers = response.headers
+        except httpx.HTTPError as e:
+            for task in tasks: task.cancel()
+            hostBreaker.record_error(sourceUrl, e)
+            raise FeedFetchError(f"Failed to fetch RSS {sourceUrl}: {e}") from e
+        except asyncio.CancelledError as e:
+            for task in tasks: task.cancel()
+            hostBreaker.record_error(sourceUrl, e)
+            raise
+
+        if stream.unchanged:
+            print(f"{sourceName} unchanged since last poll")
+            return 0
+
+        print(f"Found {stream.item_count} items in {sourceName}")
+        extracted = list(await asyncio.gather(*tasks))
+
+        new_count = await asyncio.to_thread(save_new_articles, db, extracted, source_obj, sourceName)
+        recentUrls.add_many(stream.links)
+        print(f"Saved {new_count} new articles from {sourceName}")
+
+        await asyncio.to_thread(save_feed_state, sourceId, response_headers, stream.hash)
+        return new_count
+
+    except FeedFetchError:
+        db.rollback()
+        raise
+    except Exception as e:
+        for task in tasks: task.cancel()
+        print(f"Error processing RSS {sourceName}: {e}")
+        db.rollback()
+    finally:
+        db.close()
@@ -0,0 +1,43 @@
+import os
+from datetime import datetime, timedelta
+
+from core.metrics import metrics
+from core.simhash import simhash, distance
+from crud.article import getDuplicateCandidates
+
+# Near-duplicate stories (the same agency copy in several outlets) are linked to
+# the first copy we stored and reuse its summary instead of getting their own job.
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+SIMHASH_MAX_DISTANCE = int(os.getenv("SIMHASH_MAX_DISTANCE", "3"))    # bits; the band lookup is exact up to 3
+SIMHASH_WINDOW_HOURS = int(os.getenv("SIMHASH_WINDOW_HOURS", "72"))   # how far back to look for the original
+SIMHASH_MIN_CHARS = int(os.getenv("SIMHASH_MIN_CHARS", "400"))        # short texts match too easily
+
+def fingerprint(text: str) -> int:
+    if not DEDUP_ENABLED or not text or len(text) < SIMHASH_MIN_CHARS:
+        return None
+    return simhash(text)
+
+def find_duplicates(db, fingerprints: dict[str, int]) -> dict[str, tuple[int, str]]:
+    """
+    fingerprints: {url: simhash or None}
+    Returns: {url: (canonical article id, its summary or None)} for the near-duplicates
+    """
+    hashes = [h for h in fingerprints.values() if h is not None]
+    if not hashes:
+        return {}
+    candidates = getDuplicateCandidates(db, hashes, datetime.utcnow() - timedelta(hours=SIMHASH_WINDOW_HOURS))
+
+    duplicates = {}
+    for url, h in fingerprints.items():
+        if h is None: continue
+        best = None
+        for articleId, other, summary in candidates:
+            d = distance(h, other)
+            if d <= SIMHASH_MAX_DISTANCE and (best is None or d < best[0]):
+                best = (d, articleId, summary)
+        if best:
+            duplicates[url] = (best[1], best[2])
+
+    metrics.incr("dedup.checked", len(hashes))
+    metrics.incr("dedup.duplicates", len(duplicates))
+    return duplicates
@@ -0,0 +1,108 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image as PILImage, ImageOps
+from sqlalchemy import update
+
+from model.base import TodaySessionLocal
+from model.image import Image
+from etl.image_store import derivative_path
+
+# Downscaled WebP copies written next to each stored image:
+#   images/ab/cd/<hash>.jpg -> images/ab/cd/<hash>_thumb.webp, images/ab/cd/<hash>_medium.webp
+# Sizes are the longest side in pixels; images already smaller are not upscaled.
+DERIVATIVE_SIZES = {
+    "thumb": int(os.getenv("THUMB_SIZE", "320")),
+    "medium": int(os.getenv("MEDIUM_SIZE", "1024")),
+}
+DERIVATIVE_QUALITY = int(os.getenv("DERIVATIVE_QUALITY", "80"))
+# Pillow releases the GIL while decoding/resizing/encoding, so threads are enough
+DERIVATIVE_WORKERS = int(os.getenv("DERIVATIVE_WORKERS", "2"))
+
+def make_derivatives(local_path: str) -> bool:
+    """Writes the missing derivatives of one image. Returns: True if all of them exist afterwards."""
+    targets = {name: derivative_path(local_path, name) for name in DERIVATIVE_SIZES}
+    missing = {name: path for name, path in targets.items() if not os.path.exists(path)}
+    if not missing:
+        return True
+
+    with PILImage.open(local_path) as source:
+        # Respect camera orientation, then drop palette/CMYK modes WebP can't take
+        img = ImageOps.exif_transpose(source)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+
+        for name, path in missing.items():
+            size = DERIVATIVE_SIZES[name]
+            copy = img.copy()
+            copy.thumbnail((size, size), PILImage.LANCZOS)
+            tmp = f"{path}.part"
+            copy.save(tmp, "WEBP", quality=DERIVATIVE_QUALITY, method=4)
+            os.replace(tmp, path)
+    return True
+
+class DerivativeWorker:
+    """
+    Thread pool that builds derivatives off the request/ingest path and flags the
+    image rows (derivativesReady) once done. Each blob is processed once even if
+    several rows point at it.
+    """
+    def __init__(self, workers: int = DERIVATIVE_WORKERS):
+        self._workers = workers
+        self._pool = None
+        self._lock = threading.Lock()
+        self._in_flight: set[str] = set()
+
+    def submit(self, local_path: str):
+        with self._lock:
+            if local_path in self._in_flight:
+                return
+            self._in_flight.add(local_path)
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="derivative")
+            self._pool.submit(self._run, local_path)
+
+    def stop(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=True)
+
+    def _run(self, local_path: str):
+        try:
+            make_derivatives(local_path)
+            mark_ready(local_path)
+        except Exception as e:
+            print(f"Derivatives failed for {local_path}: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(local_path)
+
+def mark_ready(local_path: str):
+    db = TodaySessionLocal()
+    try:
+        db.execute(update(Image).where(Image.localPath == local_path).values(derivativesReady=True))
+        db.commit()
+    finally:
+        db.close()
+
+derivativeWorker = DerivativeWorker()
+
+if __name__ == "__main__":
+    # Backfill for images stored before derivatives existed: python -m etl.derivatives
+    db = TodaySessionLocal()
+    try:
+        paths = [p for (p,) in db.query(Image.localPath).filter(Image.derivativesReady.isnot(True)).distinct()]
+    finally:
+        db.close()
+    print(f"Building derivatives for {len(paths)} images...")
+    done = 0
+    for path in paths:
+        try:
+            make_derivatives(path)
+            mark_ready(path)
+            done += 1
+        except Exception as e:
+            print(f"  {path}: {e}")
+    print(f"Done: {done}/{len(paths)}")
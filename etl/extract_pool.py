@@ -0,0 +1,67 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from etl.extractor import extract_with_selector
+
+# HTML parsing is pure Python and holds the GIL, so the fetch threads/event loop
+# only download pages and hand the bytes to these worker processes, which send
+# back just (text, image srcs, container selector).
+# 0 parses in the calling thread (the old behaviour).
+EXTRACT_PROCESSES = int(os.getenv("EXTRACT_PROCESSES", str(os.cpu_count() or 1)))
+
+class ExtractPool:
+    """Lazily started process pool around etl.extractor.extract_with_selector."""
+    def __init__(self, processes: int = EXTRACT_PROCESSES):
+        self._processes = processes
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a process full of threads and DB connections isn't safe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self._processes, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def _reset(self, pool: ProcessPoolExecutor):
+        # A worker died (OOM on a huge page, ...): the next call starts a fresh pool
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def extract(self, content: bytes, url: str, encoding: str = None, hint: str = None) -> tuple[str, list[str], str]:
+        """Blocking. Returns: same as extract_with_selector."""
+        if self._processes <= 0:
+            return extract_with_selector(content, url, encoding=encoding, hint=hint)
+        pool = self._get_pool()
+        try:
+            return pool.submit(extract_with_selector, content, url, encoding, None, hint).result()
+        except BrokenProcessPool:
+            self._reset(pool)
+            raise
+
+    async def extract_async(self, content: bytes, url: str, encoding: str = None, hint: str = None) -> tuple[str, list[str], str]:
+        """Awaitable version for the async fetcher; doesn't tie up a loop thread while parsing."""
+        if self._processes <= 0:
+            return await asyncio.to_thread(extract_with_selector, content, url, encoding, None, hint)
+        pool = self._get_pool()
+        try:
+            return await asyncio.wrap_future(pool.submit(extract_with_selector, content, url, encoding, None, hint))
+        except BrokenProcessPool:
+            self._reset(pool)
+            raise
+
+    def stop(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=True)
+
+extractPool = ExtractPool()
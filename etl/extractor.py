@@ -0,0 +1,262 @@
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
+
+# Article extractor engines:
+#   "bs4":  BeautifulSoup + html.parser (reference implementation)
+#   "lxml": lxml.html + compiled XPath, several times faster. Same output on
+#           well-formed markup, but libxml2 repairs broken HTML differently than
+#           html.parser (see extract_lxml), so switching engines changes the text
+#           of such pages. Run `python -m etl.extractor` over saved pages first.
+EXTRACTOR_ENGINE = os.getenv("EXTRACTOR_ENGINE", "bs4").lower()
+
+# Container search: <article>, then these tokens in class/id of layout tags
+CONTAINER_TOKENS = ["content", "news-detail", "article-body", "post-body", "entry-content"]
+JUNK_PATTERNS = ["share", "social", "related", "most-read", "banner", "author-info", "date-info", "taboola", "newsletter"]
+JUNK_TAGS = ["script", "style", "noscript", "button", "iframe", "form", "svg", "nav", "aside", "footer", "header"]
+BLOCK_PHRASES = ["haberi devamı", "ilginizi çekebilir", "paylaş:", "abone ol", "flipboard"]
+LAYOUT_TAGS = ["div", "main", "section", "article"]
+
+# Container selectors in search order: "article", then "class:<token>" / "id:<token>"
+# per token. "body" means nothing matched and the whole body was used.
+CONTAINER_SELECTORS = ["article"] + [f"{kind}:{token}" for token in CONTAINER_TOKENS for kind in ("class", "id")]
+BODY_SELECTOR = "body"
+
+def _find_container(select, hint: str = None):
+    """
+    Runs select(selector) with the hint first, then the generic order.
+    Returns: (winning selector, node) or (BODY_SELECTOR, None)
+    """
+    if hint and hint != BODY_SELECTOR:
+        node = select(hint)
+        if node is not None:
+            return hint, node
+    for selector in CONTAINER_SELECTORS:
+        if selector == hint: continue
+        node = select(selector)
+        if node is not None:
+            return selector, node
+    return BODY_SELECTOR, None
+
+def _assemble(elements) -> tuple[str, list[str]]:
+    """
+    Shared filter stage for both engines.
+    elements: ("img", src) / ("text", text) in document order
+    Returns: (text separated by blank lines, candidate image srcs in page order)
+    """
+    clean_text_lines = []
+    image_srcs = []
+
+    for kind, value in elements:
+
+        # CASE A: IMAGE (Collect, Skip Text)
+        if kind == "img":
+            src = value
+            if src and "logo" not in src.lower() and "icon" not in src.lower():
+                image_srcs.append(src)
+            continue # Do not add <img> tag to text
+
+        # CASE B: TEXT
+        text = value
+        if len(text) < 20: continue
+
+        # Filters
+        text_lower = text.lower()
+        if any(bp in text_lower for bp in BLOCK_PHRASES): continue
+        if text.startswith("#"): continue
+        if sum(c.isdigit() for c in text) > 6 and ("/" in text or ":" in text): continue
+
+        if clean_text_lines and text in clean_text_lines[-1]: continue
+
+        # Append PLAIN TEXT
+        clean_text_lines.append(text)
+
+    return "\n\n".join(clean_text_lines), image_srcs
+
+# ------------------------------------------------------------------
+# BS4 ENGINE
+# ------------------------------------------------------------------
+def _select_bs4(soup, selector: str):
+    kind, _, token = selector.partition(":")
+    node = None
+    if kind == "article":
+        node = soup.find("article")
+    # Limit search to Layout/Block tags to avoid matching menu items (li, span, a)
+    elif kind == "class":
+        node = soup.find(LAYOUT_TAGS, class_=lambda c: c and token in c)
+    elif kind == "id":
+        node = soup.find(LAYOUT_TAGS, id=lambda i: i and token in i)
+    return node
+
+def extract_bs4(content: bytes, url: str, encoding: str = None, hint: str = None) -> tuple[str, list[str], str]:
+    """
+    EXTRACTOR MODE (V3 - PLAIN TEXT), BeautifulSoup engine.
+    hint: container selector that worked for this site before (tried first)
+    Returns: (text separated by blank lines, candidate image srcs in page order, container selector used)
+    """
+    soup = BeautifulSoup(content, "html.parser")
+
+    # 1. Identify Container (learned selector first, then the generic search)
+    selector, article_node = _find_container(lambda sel: _select_bs4(soup, sel), hint)
+    if not article_node:
+        article_node = soup.body
+
+    # 2. Decompose Junk
+    def is_junk_node(tag):
+        if not tag.name: return False
+        check_str = (" ".join(tag.get("class") or []) + " " + str(tag.get("id") or "")).lower()
+        return any(p in check_str for p in JUNK_PATTERNS)
+
+    for tag in article_node.find_all(is_junk_node): tag.decompose()
+    for tag in article_node(JUNK_TAGS): tag.decompose()
+
+    # 3. Extraction Loop
+    def elements():
+        for element in article_node.find_all(['p', 'h2', 'img', 'li']):
+            if element.name == 'img':
+                yield "img", element.get("src") or element.get("data-src")
+            else:
+                yield "text", element.get_text(" ", strip=True)
+
+    return _assemble(elements()) + (selector,)
+
+# ------------------------------------------------------------------
+# LXML ENGINE
+# ------------------------------------------------------------------
+_LOWER = "translate(concat(@class, ' ', @id), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')"
+_LAYOUT = "self::div or self::main or self::section or self::article"
+
+_XP_ARTICLE = etree.XPath("(//article)[1]")
+_XP_BY_CLASS = etree.XPath(f"(//*[{_LAYOUT}][contains(@class, $token)])[1]")
+_XP_BY_ID = etree.XPath(f"(//*[{_LAYOUT}][contains(@id, $token)])[1]")
+_XP_JUNK = etree.XPath(
+    "descendant::*["
+    + " or ".join(f"contains({_LOWER}, '{p}')" for p in JUNK_PATTERNS)
+    + " or " + " or ".join(f"self::{t}" for t in JUNK_TAGS)
+    + "]"
+)
+_XP_BLOCKS = etree.XPath("descendant::*[self::p or self::h2 or self::img or self::li]")
+
+def _parse_lxml(content: bytes, encoding: str = None):
+    if encoding:
+        return lxml.html.document_fromstring(content, parser=lxml.html.HTMLParser(encoding=encoding))
+    try:
+        # Most of our sources are UTF-8; libxml2 would otherwise guess latin-1 without a meta charset
+        return lxml.html.document_fromstring(content.decode("utf-8"))
+    except (UnicodeDecodeError, ValueError):
+        return lxml.html.document_fromstring(content)
+
+def _strings_lxml(node, removed: set, pieces: list):
+    if node.text:
+        pieces.append(node.text)
+    for child in node:
+        # Comments/PIs have a non-string tag: skip their content, keep their tail
+        if isinstance(child.tag, str) and child not in removed:
+            _strings_lxml(child, removed, pieces)
+        if child.tail:
+            pieces.append(child.tail)
+
+def _text_lxml(element, removed: set) -> str:
+    """Equivalent of bs4 get_text(" ", strip=True), ignoring removed nodes and comments."""
+    pieces = []
+    _strings_lxml(element, removed, pieces)
+    return " ".join(s for s in (p.strip() for p in pieces) if s)
+
+def _select_lxml(doc, selector: str):
+    kind, _, token = selector.partition(":")
+    if kind == "article":
+        found = _XP_ARTICLE(doc)
+    elif kind == "class":
+        found = _XP_BY_CLASS(doc, token=token)
+    elif kind == "id":
+        found = _XP_BY_ID(doc, token=token)
+    else:
+        found = None
+    return found[0] if found else None
+
+def extract_lxml(content: bytes, url: str, encoding: str = None, hint: str = None) -> tuple[str, list[str], str]:
+    """
+    EXTRACTOR MODE (V3 - PLAIN TEXT), lxml engine. Mirrors extract_bs4;
+    junk nodes are skipped rather than decomposed so text around them keeps its spacing.
+    Known differences, all from broken markup (libxml2 closes tags html.parser nests):
+      - unclosed <p>/<li> followed by another one: two paragraphs here, one merged line in bs4
+      - a block tag (<div>, <table>, ...) inside <p> ends the paragraph: its text and the
+        text after it are dropped here unless they sit in their own p/h2/li, bs4 keeps them
+    """
+    doc = _parse_lxml(content, encoding)
+
+    # 1. Identify Container (learned selector first, then the generic search)
+    selector, article_node = _find_container(lambda sel: _select_lxml(doc, sel), hint)
+    if article_node is None:
+        article_node = doc.find("body")
+
+    # 2. Junk
+    removed = set()
+    for junk in _XP_JUNK(article_node):
+        if junk not in removed:
+            removed.update(junk.iter())
+
+    # 3. Extraction Loop
+    def elements():
+        for element in _XP_BLOCKS(article_node):
+            if element in removed: continue
+            if element.tag == "img":
+                yield "img", element.get("src") or element.get("data-src")
+            else:
+                yield "text", _text_lxml(element, removed)
+
+    return _assemble(elements()) + (selector,)
+
+ENGINES = {"bs4": extract_bs4, "lxml": extract_lxml}
+
+def extract_with_selector(content: bytes, url: str, encoding: str = None, engine: str = None, hint: str = None) -> tuple[str, list[str], str]:
+    """
+    Parses an already downloaded page with the configured engine (EXTRACTOR_ENGINE).
+    hint: container selector to try first (see etl/selector_cache.py)
+    Returns: (text separated by blank lines, candidate image srcs in page order, container selector used)
+    """
+    return ENGINES.get(engine or EXTRACTOR_ENGINE, extract_bs4)(content, url, encoding, hint)
+
+def extract_article_content(content: bytes, url: str, encoding: str = None, engine: str = None) -> tuple[str, list[str]]:
+    """
+    Parses an already downloaded page with the configured engine (EXTRACTOR_ENGINE).
+    Returns: (text separated by blank lines, candidate image srcs in page order)
+    """
+    text, image_srcs, _ = extract_with_selector(content, url, encoding, engine)
+    return text, image_srcs
+
+def check_parity(content: bytes, url: str = "", encoding: str = None) -> tuple[bool, tuple, tuple]:
+    """Runs both engines on one page. Returns: (same output?, bs4 result, lxml result)"""
+    reference = extract_bs4(content, url, encoding)
+    fast = extract_lxml(content, url, encoding)
+    return reference == fast, reference, fast
+
+if __name__ == "__main__":
+    # Parity + speed check over saved pages: python -m etl.extractor page1.html page2.html ...
+    if len(sys.argv) < 2:
+        print("Usage: python -m etl.extractor <page.html> [...]")
+        sys.exit(2)
+
+    mismatches = 0
+    timings = {name: 0.0 for name in ENGINES}
+    for path in sys.argv[1:]:
+        with open(path, "rb") as f:
+            content = f.read()
+        for name, engine in ENGINES.items():
+            started = time.perf_counter()
+            engine(content, "")
+            timings[name] += time.perf_counter() - started
+        same, _, _ = check_parity(content)
+        if not same:
+            mismatches += 1
+            print(f"MISMATCH {path}")
+
+    pages = len(sys.argv) - 1
+    print(f"{pages - mismatches}/{pages} pages identical")
+    for name, total in timings.items():
+        print(f"  {name}: {total / pages * 1000:.2f} ms/page")
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,143 @@
+import hashlib
+import os
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+from lxml import etree
+
+# Feeds up to this size are buffered and hash-checked before any parsing;
+# bigger ones are parsed incrementally while they download.
+FEED_BUFFER_BYTES = int(os.getenv("FEED_BUFFER_BYTES", str(1024 * 1024)))
+# Items handed to the caller per batch (one URL lookup per batch)
+FEED_BATCH_ITEMS = int(os.getenv("FEED_BATCH_ITEMS", "200"))
+
+ITEM_TAGS = ("item", "entry")
+DATE_TAGS = ("pubDate", "pubdate", "published", "updated")
+
+def _localname(tag) -> str:
+    # Comments/PIs have a non-string tag
+    if not isinstance(tag, str): return ""
+    return tag.rsplit("}", 1)[-1]
+
+def _text(elem) -> str:
+    return "".join(elem.itertext())
+
+def parse_item(elem) -> dict:
+    """<item>/<entry> element -> {title, link, pubDate}, or None if it has no link."""
+    title_node = date_node = None
+    link_nodes = []
+    for child in elem.iterdescendants():
+        name = _localname(child.tag)
+        if name == "title" and title_node is None: title_node = child
+        elif name == "link": link_nodes.append(child)
+        elif name in DATE_TAGS and date_node is None: date_node = child
+
+    title = _text(title_node).strip() if title_node is not None else "No Title"
+
+    link = None
+    if link_nodes:
+        link = _text(link_nodes[0]).strip() or link_nodes[0].get("href")
+    if not link:
+        # Atom style: <link rel="alternate" href="..."/>, possibly after other link nodes
+        link = next((node.get("href") for node in link_nodes if node.get("href")), None)
+    if not link: return None
+
+    pubDate = datetime.utcnow()
+    if date_node is not None:
+        try:
+            pubDate = parsedate_to_datetime(_text(date_node)).replace(tzinfo=None)
+        except: pass
+
+    return {"title": title, "link": link, "pubDate": pubDate}
+
+class FeedReader:
+    """
+    Incremental RSS/Atom parser (lxml pull parser): feed() bytes as they arrive
+    and get finished items back. Each item element is freed once parsed, so
+    memory stays flat regardless of feed size.
+    """
+    def __init__(self):
+        self._parser = etree.XMLPullParser(events=("end",), recover=True, resolve_entities=False)
+
+    def _drain(self) -> list[dict]:
+        items = []
+        for _, elem in self._parser.read_events():
+            if _localname(elem.tag) not in ITEM_TAGS:
+                continue
+            item = parse_item(elem)
+            if item:
+                items.append(item)
+            # Free this item and anything before it
+            elem.clear()
+            parent = elem.getparent()
+            if parent is not None:
+                while elem.getprevious() is not None:
+                    del parent[0]
+        return items
+
+    def feed(self, chunk: bytes) -> list[dict]:
+        self._parser.feed(chunk)
+        return self._drain()
+
+    def close(self) -> list[dict]:
+        try:
+            self._parser.close()
+        except etree.XMLSyntaxError:
+            pass
+        return self._drain()
+
+class FeedStream:
+    """
+    Wraps a feed download: hashes the body as it arrives, buffers small feeds so
+    an unchanged one (same hash as known_hash) is dropped before parsing, and
+    switches to incremental parsing once FEED_BUFFER_BYTES is exceeded.
+    feed()/close() return batches of new-in-this-feed items (duplicate links dropped).
+    """
+    def __init__(self, known_hash: str = None):
+        self._known_hash = known_hash
+        self._hasher = hashlib.sha256()
+        self._buffer: list[bytes] = []
+        self._buffered = 0
+        self._reader: FeedReader = None
+        self._pending: list[dict] = []
+        self.links: set[str] = set()
+        self.item_count = 0
+        self.hash: str = None
+        self.unchanged = False
+
+    def _collect(self, items: list[dict], final: bool = False) -> list[dict]:
+        for item in items:
+            if item["link"] in self.links: continue
+            self.links.add(item["link"])
+            self._pending.append(item)
+        self.item_count = len(self.links)
+        if final or len(self._pending) >= FEED_BATCH_ITEMS:
+            batch, self._pending = self._pending, []
+            return batch
+        return []
+
+    def feed(self, chunk: bytes) -> list[dict]:
+        self._hasher.update(chunk)
+        if self._reader is not None:
+            return self._collect(self._reader.feed(chunk))
+
+        self._buffer.append(chunk)
+        self._buffered += len(chunk)
+        if self._buffered <= FEED_BUFFER_BYTES:
+            return []
+
+        # Large feed: start parsing now instead of holding it all
+        self._reader = FeedReader()
+        buffered, self._buffer = b"".join(self._buffer), []
+        return self._collect(self._reader.feed(buffered))
+
+    def close(self) -> list[dict]:
+        self.hash = self._hasher.hexdigest()
+        if self._reader is None:
+            if self.hash == self._known_hash:
+                self.unchanged = True
+                return []
+            self._reader = FeedReader()
+            buffered, self._buffer = b"".join(self._buffer), []
+            return self._collect(self._reader.feed(buffered) + self._reader.close(), final=True)
+        return self._collect(self._reader.close(), final=True)
@@ -1,248 +1,337 @@
-import httpx
+import hashlib
 import os
-import uuid
-from bs4 import BeautifulSoup
-from email.utils import parsedate_to_datetime
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin
 
+import httpx
+
 from model.base import TodaySessionLocal, ConfigSessionLocal
-from crud.article import createArticle, getArticleByUrl
-from schema.article import ArticleCreate, ArticleUpdate
-from crud.job import addJob
-from model.image import Image
-from crud.article import updateArticle
-from crud.source import getSource
+from crud.article import bulkCreateArticles, getExistingArticleUrls
+from schema.article import ArticleCreate
+from crud.job import bulkAddJobs
+from crud.source import getSource, updateSourceFeedState
+from etl.http import get_client, hostBreaker, FeedFetchError
+from etl.url_cache import recentUrls
+from etl.image_pipeline import imagePipeline
+from etl.image_store import IMAGES_ROOT, temp_path, commit_temp_file
+from etl.extract_pool import extractPool
+from etl.selector_cache import selectorCache
+from etl.page_cache import pageCache
+from etl.feed_reader import FeedStream
+from etl.dedup import fingerprint, find_duplicates
+from etl.image_probe import probe_size, is_wanted_size, IMAGE_PROBE_BYTES
+from core.metrics import metrics
 
 # Ensure images directory exists
-IMAGES_ROOT = "images"
 os.makedirs(IMAGES_ROOT, exist_ok=True)
 
+# Item pages fetched/extracted in parallel per feed
+FEED_ITEM_CONCURRENCY = int(os.getenv("FEED_ITEM_CONCURRENCY", "8"))
+
 # Filters for junk images
 JUNK_KEYWORDS = ["logo", "icon", "share", "social", "button", "badge", "avatar", "profile", "tracker", "pixel", "ad-", "banner"]
 
-def download_and_save_image(src_url: str, article_base_url: str) -> tuple[str, str, str]:
+def is_junk_image_url(src_url: str) -> bool:
+    """URL-only filter: junk keywords, data URIs, svgs (icons) and gifs (often loaders)."""
+    if not src_url:
+        return True
+    lower_url = src_url.lower()
+    if any(keyword in lower_url for keyword in JUNK_KEYWORDS):
+        return True
+    if src_url.startswith("data:") or ".svg" in lower_url or ".gif" in lower_url:
+        return True
+    return False
+
+def image_extension(headers, lower_url: str) -> str:
     """
-    Downloads image with filtering for junk (logos, icons, tiny files).
-    Returns: (local_path, web_path, original_url) or None
+    Header checks for a streamed image response.
+    Returns: file extension to store the body under, or None to skip.
     """
-    if not src_url:
+    # Size Check (Skip if < 5KB)
+    content_length = headers.get("content-length")
+    if content_length and int(content_length) < 5120:
         return None
         
+    # Content-Type Check
+    ctype = headers.get("content-type", "").lower()
+    if "image" not in ctype:
+         # Last chance: check extension if header is missing/wrong
+         if not any(ext in lower_url for ext in [".jpg", ".jpeg", ".png", ".webp"]):
+             return None
+    
+    # Extension deduction
+    ext = ".jpg"
+    if "png" in ctype or ".png" in lower_url: ext = ".png"
+    elif "webp" in ctype or ".webp" in lower_url: ext = ".webp"
+    return ext
+
+def download_and_save_image(src_url: str, article_base_url: str, max_bytes: int = None) -> tuple[str, str, str, str]:
+    """
+    Downloads image with filtering for junk (logos, icons, tiny files, and images
+    too small or elongated according to their header, see etl/image_probe.py).
+    The body is hashed while streaming and stored once per unique content.
+    max_bytes: abort (and skip) images larger than this budget.
+    Returns: (local_path, web_path, original_url, content_hash) or None
+    """
+    # 1. Text Filter: Check URL for junk keywords
+    if is_junk_image_url(src_url):
+        return None
+        
+    full_url = urljoin(article_base_url, src_url)
+    if not hostBreaker.allow(full_url):
+        return None
+    
+    tmp_file_path = None
     try:
-        # 1. Text Filter: Check URL for junk keywords
         lower_url = src_url.lower()
-        if any(keyword in lower_url for keyword in JUNK_KEYWORDS):
-            return None
-            
-        # Avoid data URIs, svgs (icons), and gifs (often loaders)
-        if src_url.startswith("data:") or ".svg" in lower_url or ".gif" in lower_url:
-            return None
-
-        headers = {"User-Agent": "Mozilla/5.0"}
-        full_url = urljoin(article_base_url, src_url)
         
         # 2. Content Filter: Stream headers first
-        with httpx.stream("GET", full_url, headers=headers, timeout=10.0) as resp:
+        with get_client().stream("GET", full_url, timeout=10.0) as resp:
+            hostBreaker.record_response(full_url, resp.status_code)
             resp.raise_for_status()
             
-            # Size Check (Skip if < 5KB)
             content_length = resp.headers.get("content-length")
-            if content_length and int(content_length) < 5120:
+            if max_bytes is not None and content_length and int(content_length) > max_bytes:
                 return None
-                
-            # Content-Type Check
-            ctype = resp.headers.get("content-type", "").lower()
-            if "image" not in ctype:
-                 # Last chance: check extension if header is missing/wrong
-                 if not any(ext in lower_url for ext in [".jpg", ".jpeg", ".png", ".webp"]):
-                     return None
-
-            # --- Save Logic ---
-            now = datetime.utcnow()
-            year_str = now.strftime("%Y")
-            month_str = now.strftime("%m")
-            folder_path = os.path.join(IMAGES_ROOT, year_str, month_str)
-            os.makedirs(folder_path, exist_ok=True)
             
-            # Extension deduction
-            ext = ".jpg"
-            if "png" in ctype or ".png" in lower_url: ext = ".png"
-            elif "webp" in ctype or ".webp" in lower_url: ext = ".webp"
-            
-            filename = f"{uuid.uuid4()}{ext}"
-            local_file_path = os.path.join(folder_path, filename)
-            web_path = f"/static/images/{year_str}/{month_str}/{filename}"
+            ext = image_extension(resp.headers, lower_url)
+            if not ext:
+                return None
             
-            # Download body
-            with open(local_file_path, "wb") as f:
+            # Download body (hashing as we go)
+            tmp_file_path = temp_path()
+            hasher = hashlib.sha256()
+            over_budget = False
+            head = b""      # kept until the header tells us the pixel size
+            probing = True
+            with open(tmp_file_path, "wb") as f:
                 downloaded_size = 0
                 for chunk in resp.iter_bytes():
+                    if probing:
+                        head += chunk
+                        size = probe_size(head)
+                        if size:
+                            probing = False
+                            # 3. Pixel Filter: drop pixels/banners/thumbnails before the rest arrives
+                            if not is_wanted_size(*size):
+                                metrics.incr("images.rejected_size")
+                                return None
+                        elif len(head) >= IMAGE_PROBE_BYTES:
+                            probing = False
                     f.write(chunk)
+                    hasher.update(chunk)
                     downloaded_size += len(chunk)
+                    if max_bytes is not None and downloaded_size > max_bytes:
+                        over_budget = True
+                        break
             
             # Final Size Check (if Content-Length was missing)
-            if downloaded_size < 5120: 
-                os.remove(local_file_path)
+            if over_budget or downloaded_size < 5120: 
                 return None
             
-            return (local_file_path, web_path, full_url)
+            content_hash = hasher.hexdigest()
+            local_file_path, web_path = commit_temp_file(tmp_file_path, content_hash, ext)
+            tmp_file_path = None
+            return (local_file_path, web_path, full_url, content_hash)
 
     except Exception as e:
         # print(f"Image download error: {e}")
+        hostBreaker.record_error(full_url, e)
         return None
+    finally:
+        if tmp_file_path and os.path.exists(tmp_file_path):
+            os.remove(tmp_file_path)
+
+def finish_extract(url: str, hint: str, extracted: tuple) -> tuple[str, list[str]]:
+    """Bookkeeping on an extractor worker's result. Returns: (text, image srcs worth downloading)"""
+    text, image_srcs, selector = extracted
+    selectorCache.record(url, hint, selector)
+    return text, [src for src in image_srcs if not is_junk_image_url(src)]
 
-def fetch_and_process_article_content(db, article_db_obj, url: str) -> str:
+def cache_and_extract(url: str, content: bytes, encoding: str) -> tuple[str, list[str]]:
+    """Keeps the raw page (for reprocess.py) and extracts it in the extractor pool. Returns: (text, image srcs worth downloading)"""
+    pageCache.put(url, content, encoding)
+    hint = selectorCache.get(url)
+    return finish_extract(url, hint, extractPool.extract(content, url, encoding, hint))
+
+def fetch_and_process_article_content(url: str) -> tuple[str, list[str]]:
     """
-    EXTRACTOR MODE (V3 - PLAIN TEXT):
-    Returns pure text separated by newlines. 
-    Images are saved to DB but excluded from text.
+    Returns: (pure text separated by newlines, image srcs worth downloading).
+    Images are excluded from the text and downloaded later by the image pipeline.
     """
+    if not hostBreaker.allow(url):
+        print(f"Skipping {url}: host circuit open")
+        return "", []
     try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        resp = httpx.get(url, headers=headers, timeout=10.0, follow_redirects=True)
+        resp = get_client().get(url, timeout=10.0, follow_redirects=True)
+        hostBreaker.record_response(url, resp.status_code)
         resp.raise_for_status()
         
-        soup = BeautifulSoup(resp.content, "html.parser")
-        
-        # 1. Identify Container
-        article_node = soup.find("article")
-        if not article_node:
-            candidates = ["content", "news-detail", "article-body", "post-body", "entry-content"]
-            for token in candidates:
-                # Limit search to Layout/Block tags to avoid matching menu items (li, span, a)
-                article_node = soup.find(["div", "main", "section", "article"], class_=lambda c: c and token in c) or \
-                               soup.find(["div", "main", "section", "article"], id=lambda i: i and token in i)
-                if article_node: break
-        
-        if not article_node:
-            article_node = soup.body
+        return cache_and_extract(url, resp.content, resp.charset_encoding)
 
-        # 2. Decompose Junk
-        junk_patterns = ["share", "social", "related", "most-read", "banner", "author-info", "date-info", "taboola", "newsletter"]
-        def is_junk_node(tag):
-            if not tag.name: return False
-            check_str = (" ".join(tag.get("class") or []) + " " + str(tag.get("id") or "")).lower()
-            return any(p in check_str for p in junk_patterns)
+    except Exception as e:
+        hostBreaker.record_error(url, e)
+        print(f"Error: {e}")
+        return "", []
 
-        for tag in article_node.find_all(is_junk_node): tag.decompose()
-        for tag in article_node(["script", "style", "noscript", "button", "iframe", "form", "svg", "nav", "aside", "footer", "header"]): tag.decompose()
+def extract_item(item: dict) -> tuple:
+    """Fan-out unit: fetches and extracts one item page. Returns: (item, text, image_srcs)"""
+    print(f"Processing content for: {item['title']}")
+    text, image_srcs = fetch_and_process_article_content(item["link"])
+    return (item, text, image_srcs)
 
-        clean_text_lines = []
-        
-        # 3. Extraction Loop
-        for element in article_node.find_all(['p', 'h2', 'img', 'li']):
-            
-            # CASE A: IMAGE (Save to DB, Skip Text)
-            if element.name == 'img':
-                src = element.get("src") or element.get("data-src")
-                if src and "logo" not in src.lower() and "icon" not in src.lower():
-                    result = download_and_save_image(src, url)
-                    if result:
-                        db.add(Image(articleId=article_db_obj.id, localPath=result[0], originalUrl=result[2]))
-                continue # Do not add <img> tag to text
-
-            # CASE B: TEXT
-            text = element.get_text(" ", strip=True)
-            if len(text) < 20: continue 
-            
-            # Filters
-            text_lower = text.lower()
-            block_phrases = ["haberi devamı", "ilginizi çekebilir", "paylaş:", "abone ol", "flipboard"]
-            if any(bp in text_lower for bp in block_phrases): continue
-            if text.startswith("#"): continue
-            if sum(c.isdigit() for c in text) > 6 and ("/" in text or ":" in text): continue
-            
-            if clean_text_lines and text in clean_text_lines[-1]: continue
+def load_source(sourceId: int):
+    """Fetch Source Object to get Category/Language"""
+    db_config = ConfigSessionLocal()
+    try:
+        return getSource(db_config, sourceId)
+    finally:
+        db_config.close()
 
-            # Append PLAIN TEXT
-            clean_text_lines.append(text)
+def feed_request_headers(source_obj) -> dict:
+    """Conditional GET validators from the last processed poll."""
+    headers = {}
+    if source_obj is not None:
+        if source_obj.etag: headers["If-None-Match"] = source_obj.etag
+        if source_obj.lastModified: headers["If-Modified-Since"] = source_obj.lastModified
+    return headers
 
-        return "\n\n".join(clean_text_lines)
+def save_feed_state(sourceId: int, response_headers, feed_hash: str):
+    db_config = ConfigSessionLocal()
+    try:
+        updateSourceFeedState(
+            db_config, sourceId,
+            etag=response_headers.get("etag"),
+            lastModified=response_headers.get("last-modified"),
+            feedHash=feed_hash
+        )
+    finally:
+        db_config.close()
 
-    except Exception as e:
-        print(f"Error: {e}")
-        return ""
+def filter_new_items(db, items: list[dict]) -> list[dict]:
+    """
+    Drops feed items whose URL is already stored: recent-URL cache first,
+    then one 'IN (...)' query for the rest, instead of a lookup per item.
+    """
+    unique_items = {}
+    for item in items:
+        unique_items.setdefault(item["link"], item)
+    
+    known, unknown = recentUrls.split(unique_items.keys())
+    existing = getExistingArticleUrls(db, unknown)
+    recentUrls.add_many(existing)
+    
+    return [item for link, item in unique_items.items() if link not in known and link not in existing]
+
+def save_new_articles(db, extracted: list[tuple], source_obj, sourceName: str) -> int:
+    """
+    Single writer for a feed: one INSERT ... ON CONFLICT for the articles and
+    their summarization jobs in one transaction. Images are handed to the
+    image pipeline afterwards, so the commit never waits on downloads.
+    extracted: [(item, text, image_srcs)]
+    Returns: number of articles actually inserted
+    """
+    if not extracted:
+        return 0
+    
+    # Near-duplicates of a stored story borrow its summary (or get it once it exists)
+    fingerprints = {item["link"]: fingerprint(text) for item, text, image_srcs in extracted}
+    duplicates = find_duplicates(db, fingerprints)
+    
+    # CREATE ARTICLES with Category & Language
+    articles = []
+    for item, text, image_srcs in extracted:
+        canonicalId, canonicalSummary = duplicates.get(item["link"], (None, None))
+        articles.append(ArticleCreate(
+            title=item["title"],
+            url=item["link"],
+            content=text or "Fetching...",
+            pubDate=item["pubDate"],
+            sourceName=sourceName,
+            isSummarized=bool(canonicalSummary),
+            summary=canonicalSummary,
+            category=source_obj.category,
+            language=source_obj.language,
+            simhash=fingerprints[item["link"]],
+            canonicalArticleId=canonicalId
+        ))
+    inserted = bulkCreateArticles(db, articles)
+    
+    # Config/Today sessions share one Postgres DB, so jobs ride along in this transaction
+    bulkAddJobs(db, [url for url in inserted if url not in duplicates])
+    db.commit()
+    linked = sum(1 for url in inserted if url in duplicates)
+    if linked:
+        print(f"Linked {linked} near-duplicate articles from {sourceName}, no summary jobs for them")
+    
+    for item, text, image_srcs in extracted:
+        articleId = inserted.get(item["link"])
+        if articleId:
+            imagePipeline.submit(articleId, item["link"], image_srcs)
+    
+    return len(inserted)
 
 def processSource(sourceId: int, sourceUrl: str, sourceName: str):
+    """
+    Polls one feed. Returns: number of new articles saved (0 if unchanged), None if processing failed.
+    Raises FeedFetchError when the feed itself can't be downloaded (counts against the source's backoff).
+    """
     print(f"Downloading RSS {sourceName} ({sourceUrl})...")
     
     # 1. Fetch Source Object to get Category/Language
-    db_config = ConfigSessionLocal()
-    source_obj = getSource(db_config, sourceId)
-    db_config.close()
-
-    try:
-        response = httpx.get(sourceUrl, timeout=60.0)
-    except Exception as e:
-        print(f"Failed to fetch RSS {sourceUrl}: {e}")
-        return
-
-    soup = BeautifulSoup(response.content, features="xml")
-    items = soup.find_all(["item", "entry"])
-    print(f"Found {len(items)} items in {sourceName}")
+    source_obj = load_source(sourceId)
     
     db = TodaySessionLocal()
-    new_count = 0
+    stream = FeedStream(source_obj.feedHash if source_obj else None)
     
     try:
-        for item in items:
-            # ... (Title/Link extraction logic stays the same) ...
-            title_node = item.find("title")
-            title = title_node.get_text().strip() if title_node else "No Title"
+        # 2. Stream the feed; new items' pages are fetched/extracted in parallel
+        # (FEED_ITEM_CONCURRENCY) while the rest of the feed is still downloading
+        with ThreadPoolExecutor(max_workers=max(1, FEED_ITEM_CONCURRENCY)) as pool:
+            futures = []
+            def submit(batch):
+                for item in filter_new_items(db, batch):
+                    futures.append(pool.submit(extract_item, item))
             
-            link = None
-            link_node = item.find("link")
-            if link_node: 
-                link = link_node.get_text().strip()
-                if not link and link_node.has_attr('href'): link = link_node['href']
-            if not link:
-                atom_link = item.find(["atom:link", "link"])
-                if atom_link and atom_link.has_attr("href"): link = atom_link["href"]
-            if not link: continue
+            if not hostBreaker.allow(sourceUrl):
+                raise FeedFetchError(f"Host circuit open for {sourceUrl}")
+            try:
+                with get_client().stream("GET", sourceUrl, headers=feed_request_headers(source_obj), timeout=60.0) as response:
+                    hostBreaker.record_response(sourceUrl, response.status_code)
+                    if response.status_code == 304:
+                        print(f"{sourceName} unchanged since last poll (304)")
+                        return 0
+                    response.raise_for_status()
+                    for chunk in response.iter_bytes():
+                        submit(stream.feed(chunk))
+                    submit(stream.close())
+                    response_headers = response.headers
+            except httpx.HTTPError as e:
+                for future in futures: future.cancel()
+                hostBreaker.record_error(sourceUrl, e)
+                raise FeedFetchError(f"Failed to fetch RSS {sourceUrl}: {e}") from e
             
-            if getArticleByUrl(db, link): continue
+            if stream.unchanged:
+                print(f"{sourceName} unchanged since last poll")
+                return 0
             
-            pubDate = datetime.utcnow()
-            # ... (Date parsing logic stays the same) ...
-            pubDateNode = item.find(["pubDate", "pubdate", "published", "updated"])
-            if pubDateNode:
-                try:
-                    pubDate = parsedate_to_datetime(pubDateNode.get_text()).replace(tzinfo=None)
-                except: pass
-
-            # CREATE ARTICLE with Category & Language
-            articleData = ArticleCreate(
-                title=title,
-                url=link,
-                content="Fetching...",
-                pubDate=pubDate,
-                sourceName=sourceName,
-                isSummarized=False,
-                category=source_obj.category,  # <--- PASS CATEGORY
-                language=source_obj.language  # <--- PASS LANGUAGE
-            )
-            created_article = createArticle(db, articleData)
-            
-            if created_article:
-                new_count += 1
-                # ... (Content processing stays the same) ...
-                print(f"Processing content for: {title}")
-                final_html = fetch_and_process_article_content(db, created_article, link)
-                if final_html: 
-                    created_article.content = final_html
-                    db.add(created_article)
-                    db.commit()
-                
-                configDb = ConfigSessionLocal()
-                addJob(configDb, link)
-                configDb.close()
+            print(f"Found {stream.item_count} items in {sourceName}")
+            extracted = [future.result() for future in futures]
         
-        db.commit()
+        # 3. Single writer
+        new_count = save_new_articles(db, extracted, source_obj, sourceName)
+        recentUrls.add_many(stream.links)
         print(f"Saved {new_count} new articles from {sourceName}")
         
+        # Only remember the feed once it was fully processed, so a failed run is retried
+        save_feed_state(sourceId, response_headers, stream.hash)
+        return new_count
+        
+    except FeedFetchError:
+        db.rollback()
+        raise
     except Exception as e:
         print(f"Error processing RSS {sourceName}: {e}")
         db.rollback()
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
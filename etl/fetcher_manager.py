@@ -1,3 +1,6 @@
+import asyncio
+import os
+import random
 import threading
 import time
 from concurrent.futures import ThreadPoolExecutor
@@ -5,34 +8,151 @@ from datetime import datetime, timedelta
 from typing import Set
 
 from model.base import ConfigSessionLocal
-from crud.source import getActiveSources, updateSource, getSource
+from crud.source import (
+    getActiveSources, updateSource, getSource, markSourceFetched, markSourceFailed,
+    markSourceProcessingFailed, claimSource, releaseSourceLease, renewSourceLeases
+)
 from schema.source import SourceUpdate
+from etl.scheduler import SourceScheduler, to_epoch
+from etl.http import FeedFetchError
+from etl.leader import INSTANCE_ID, LeaderJob
 # from etl.fetcher import processSource  <-- Imported inside wrapper
 
+# "thread": blocking fetches on a thread pool (default)
+# "async":  one event loop + one shared AsyncClient for all sources
+FETCH_MODE = os.getenv("FETCH_MODE", "thread").lower()
+# Max sources being processed at once in async mode
+FETCH_MAX_CONCURRENT_SOURCES = int(os.getenv("FETCH_MAX_CONCURRENT_SOURCES", "200"))
+# The schedule is kept in memory and updated on every change; this full reload
+# only catches edits made behind the API's back (e.g. straight in the DB)
+SCHEDULER_RESYNC_MINUTES = int(os.getenv("SCHEDULER_RESYNC_MINUTES", "30"))
+# Adaptive polling: each source's interval starts at fetchIntervalMinutes, is
+# multiplied by POLL_SPEEDUP after a poll that found new items and by
+# POLL_BACKOFF after one that found none, and stays within [POLL_MIN, POLL_MAX].
+POLL_MIN_MINUTES = float(os.getenv("POLL_MIN_MINUTES", "2"))
+POLL_MAX_MINUTES = float(os.getenv("POLL_MAX_MINUTES", "240"))
+POLL_SPEEDUP = float(os.getenv("POLL_SPEEDUP", "0.5"))
+POLL_BACKOFF = float(os.getenv("POLL_BACKOFF", "1.5"))
+
+# Failing feeds: retry after interval * 2^failures (capped at SOURCE_BACKOFF_MAX_MINUTES);
+# after SOURCE_CIRCUIT_THRESHOLD failures in a row the circuit opens and the source
+# is only probed once every SOURCE_CIRCUIT_COOLDOWN_MINUTES until a poll succeeds.
+SOURCE_BACKOFF_MAX_MINUTES = float(os.getenv("SOURCE_BACKOFF_MAX_MINUTES", "240"))
+SOURCE_CIRCUIT_THRESHOLD = int(os.getenv("SOURCE_CIRCUIT_THRESHOLD", "5"))
+SOURCE_CIRCUIT_COOLDOWN_MINUTES = float(os.getenv("SOURCE_CIRCUIT_COOLDOWN_MINUTES", "360"))
+
+# Several app instances can run against one DB: every instance keeps the full
+# schedule, but a due source is only polled by whoever takes its lease first.
+# The lease is taken when a worker actually starts on the source (not while it
+# waits in the pool queue) and renewed every third of SOURCE_LEASE_MINUTES while
+# the poll runs. A crashed instance's leases simply run out.
+SOURCE_LEASE_MINUTES = float(os.getenv("SOURCE_LEASE_MINUTES", "10"))
+# Recheck delay for a source another instance was claiming at the same moment
+SOURCE_CLAIM_RETRY_SECONDS = float(os.getenv("SOURCE_CLAIM_RETRY_SECONDS", "5"))
+
+def current_interval(source) -> float:
+    return source.effectiveIntervalMinutes or source.fetchIntervalMinutes
+
+def adapt_interval(interval: float, new_items: int) -> float:
+    """Next polling interval (minutes) given what the last poll yielded."""
+    if new_items is None:
+        # Failed poll: says nothing about the publish rate
+        return interval
+    interval *= POLL_SPEEDUP if new_items > 0 else POLL_BACKOFF
+    return min(max(interval, POLL_MIN_MINUTES), POLL_MAX_MINUTES)
+
+def retry_delay(interval: float, failures: int) -> float:
+    """Minutes until the next attempt after `failures` failed polls in a row."""
+    if failures >= SOURCE_CIRCUIT_THRESHOLD:
+        delay = SOURCE_CIRCUIT_COOLDOWN_MINUTES
+    else:
+        delay = min(interval * 2 ** failures, SOURCE_BACKOFF_MAX_MINUTES)
+    # Jitter so sources on the same dead host don't retry in lockstep
+    return delay * random.uniform(1.0, 1.1)
+
 class FetcherManager:
-    def __init__(self, max_workers: int = 10):
+    def __init__(self, max_workers: int = 10, mode: str = FETCH_MODE):
         self._stop_event = threading.Event()
         self._thread = None
-        self._pool = ThreadPoolExecutor(max_workers=max_workers)
-        self._running_tasks: Set[int] = set()
+        self._mode = mode
+        self._pool = ThreadPoolExecutor(max_workers=max_workers) if mode != "async" else None
+        self._running_tasks: Set[int] = set()   # queued or being polled
+        self._leased: Set[int] = set()          # being polled under our lease
         self._lock = threading.Lock()
+        self._scheduler = SourceScheduler()
+        # Jobs that must run on one instance only (see etl/leader.py)
+        self._leader_jobs: list[LeaderJob] = []
+        
+        # Async mode: loop thread + shared client, created in start()
+        self._loop = None
+        self._loop_thread = None
+        self._http = None
+        self._source_slots = None
 
     def start(self):
         """Starts the main orchestration loop."""
         if self._thread is None:
             self._stop_event.clear()
+            if self._mode == "async":
+                self._start_loop()
+            self._load_schedule()
             self._thread = threading.Thread(target=self._run_loop, daemon=True)
             self._thread.start()
-            print("FetcherManager started.")
+            for job in self._leader_jobs:
+                job.start()
+            print(f"FetcherManager started ({INSTANCE_ID}).")
 
     def stop(self):
         """Stops the main orchestration loop."""
         if self._thread:
             print("Stopping FetcherManager...")
             self._stop_event.set()
+            self._scheduler.wake()
             self._thread.join()
-            self._pool.shutdown(wait=True)
+            self._thread = None
+            for job in self._leader_jobs:
+                job.stop()
+            if self._mode == "async":
+                self._stop_loop()
+            else:
+                self._pool.shutdown(wait=True)
+            from etl.image_pipeline import imagePipeline
+            imagePipeline.stop()
+            from etl.extract_pool import extractPool
+            extractPool.stop()
+            from etl.http import close_client
+            close_client()
             print("FetcherManager stopped.")
+
+    def _start_loop(self):
+        """Async mode: run a private event loop in its own thread and open the shared client on it."""
+        from etl.http import AsyncHttp
+        
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._loop_thread.start()
+        
+        self._http = AsyncHttp()
+        
+        async def _init():
+            self._source_slots = asyncio.Semaphore(FETCH_MAX_CONCURRENT_SOURCES)
+            await self._http.start()
+        asyncio.run_coroutine_threadsafe(_init(), self._loop).result()
+        print(f"FetcherManager async loop started (max {FETCH_MAX_CONCURRENT_SOURCES} sources in flight).")
+
+    def _stop_loop(self):
+        async def _shutdown():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._http.close()
+        asyncio.run_coroutine_threadsafe(_shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join()
+        self._loop.close()
+        self._loop = None
+        self._loop_thread = None
             
     def start_source(self, source_id: int):
         """Enable a source and schedule it immediately."""
@@ -40,8 +160,8 @@ class FetcherManager:
         try:
             updateSource(db, source_id, SourceUpdate(isActive=True))
             print(f"Source {source_id} enabled.")
-            # Trigger immediate fetch
-            self._schedule_task(source_id) 
+            # Trigger immediate fetch, even if it isn't due / its circuit is open
+            self._scheduler.schedule(source_id, time.time(), force=True)
         finally:
             db.close()
 
@@ -50,83 +170,216 @@ class FetcherManager:
         db = ConfigSessionLocal()
         try:
             updateSource(db, source_id, SourceUpdate(isActive=False))
+            self._scheduler.remove(source_id)
             print(f"Source {source_id} disabled.")
         finally:
             db.close()
 
+    def schedule_source(self, source):
+        """(Re)schedules a created/updated source from its own settings, or drops it if inactive."""
+        if not source.isActive:
+            self._scheduler.remove(source.id)
+            return
+        self._scheduler.schedule(source.id, self._next_due(source))
+
+    def remove_source(self, source_id: int):
+        self._scheduler.remove(source_id)
+
+    def add_leader_job(self, name: str, interval: float, fn):
+        """Registers fn to run every `interval` seconds on one instance only (call before start())."""
+        self._leader_jobs.append(LeaderJob(name, interval, fn))
+
+    def _next_due(self, source) -> float:
+        if source.nextRetryTime:
+            return to_epoch(source.nextRetryTime)
+        if not source.lastFetchTime:
+            return time.time()
+        return to_epoch(source.lastFetchTime) + current_interval(source) * 60
+
+    def _load_schedule(self):
+        """Builds the schedule from the DB (startup and periodic resync)."""
+        db = ConfigSessionLocal()
+        try:
+            sources = getActiveSources(db)
+        finally:
+            db.close()
+
+        self._scheduler.clear()
+        for source in sources:
+            self._scheduler.schedule(source.id, self._next_due(source))
+        print(f"Scheduler loaded {len(sources)} active sources.")
+
     def _run_loop(self):
+        next_resync = time.time() + SCHEDULER_RESYNC_MINUTES * 60
+        next_renew = time.time() + SOURCE_LEASE_MINUTES * 60 / 3
         while not self._stop_event.is_set():
             try:
-                self._check_and_schedule_all()
+                # Sleeps until the earliest source is due (or the schedule changes)
+                wake_at = min(next_resync, next_renew)
+                due = self._scheduler.wait_due(self._stop_event, max_wait=wake_at - time.time())
+                for source_id, forced in due:
+                    self._schedule_task(source_id, forced)
+
+                if time.time() >= next_renew:
+                    self._renew_leases()
+                    next_renew = time.time() + SOURCE_LEASE_MINUTES * 60 / 3
+                if time.time() >= next_resync:
+                    self._load_schedule()
+                    next_resync = time.time() + SCHEDULER_RESYNC_MINUTES * 60
             except Exception as e:
-                print(f"Error in Check Loop: {e}")
-            
-            # Check every 10 seconds (responsive enough)
-            for _ in range(10): 
-                if self._stop_event.is_set():
-                    break
+                print(f"Error in Scheduler Loop: {e}")
                 time.sleep(1)
 
-    def _check_and_schedule_all(self):
+    def _renew_leases(self):
+        """Keeps the leases of polls still running (a big backfill can outlast SOURCE_LEASE_MINUTES)."""
+        with self._lock:
+            leased = set(self._leased)
+        if not leased:
+            return
         db = ConfigSessionLocal()
         try:
-            sources = getActiveSources(db)
-            now = datetime.utcnow()
-            
-            for source in sources:
-                shouldFetch = False
-                if not source.lastFetchTime:
-                    shouldFetch = True
-                else:
-                    nextFetch = source.lastFetchTime + timedelta(minutes=source.fetchIntervalMinutes)
-                    if now >= nextFetch:
-                        shouldFetch = True
-                
-                if shouldFetch:
-                    self._schedule_task(source.id, source.url, source.name)
+            renewSourceLeases(db, leased, INSTANCE_ID, datetime.utcnow() + timedelta(minutes=SOURCE_LEASE_MINUTES))
+        except Exception as e:
+            print(f"Error renewing source leases: {e}")
         finally:
             db.close()
-            
-    def _schedule_task(self, source_id: int, source_url: str = None, source_name: str = None):
-        """Thread-safe scheduling."""
-        # If url/name not provided (e.g. manual start), fetch it
-        if not source_url or not source_name:
-            db = ConfigSessionLocal()
-            src = getSource(db, source_id)
-            db.close()
-            if src:
-                source_url = src.url
-                source_name = src.name
-            else:
-                return
 
+    def _schedule_task(self, source_id: int, force: bool = False):
+        """Thread-safe scheduling. The source is claimed once a worker picks it up."""
         with self._lock:
             if source_id in self._running_tasks:
                 return
             self._running_tasks.add(source_id)
-            
-        self._pool.submit(self._task_wrapper, source_id, source_url, source_name)
+        
+        if self._mode == "async":
+            asyncio.run_coroutine_threadsafe(self._async_task_wrapper(source_id, force), self._loop)
+        else:
+            self._pool.submit(self._task_wrapper, source_id, force)
+
+    def _claim(self, source_id: int, force: bool = False):
+        """
+        Takes the source's lease so no other instance polls it at the same time.
+        force: manual start, poll it even if the DB says it isn't due.
+        Returns: (url, name) if this instance should poll it now, else None; the
+        source is then put back on the schedule for when it's worth checking again.
+        """
+        due = None
+        db = ConfigSessionLocal()
+        try:
+            now = datetime.utcnow()
+            source = claimSource(db, source_id, INSTANCE_ID, now, now + timedelta(minutes=SOURCE_LEASE_MINUTES))
+            if source is None:
+                # Taken by another instance (or stopped/deleted meanwhile)
+                source = getSource(db, source_id)
+                if source and source.isActive:
+                    due = max(self._next_due(source), time.time() + SOURCE_CLAIM_RETRY_SECONDS)
+                    if source.leaseExpiresAt:
+                        due = max(due, to_epoch(source.leaseExpiresAt))
+            elif not force and self._next_due(source) > time.time() + 1:
+                # Polled by another instance since our schedule was built
+                due = self._next_due(source)
+                releaseSourceLease(db, source_id, INSTANCE_ID)
+            else:
+                with self._lock:
+                    self._leased.add(source_id)
+                return source.url, source.name
+        except Exception as e:
+            print(f"Error claiming source {source_id}: {e}")
+            db.rollback()
+            due = time.time() + SOURCE_CLAIM_RETRY_SECONDS
+        finally:
+            db.close()
+
+        if due is not None:
+            self._scheduler.schedule(source_id, due)
+        return None
+
+    def _task_wrapper(self, sourceId: int, force: bool = False):
+        claimed = self._claim(sourceId, force)
+        if not claimed:
+            with self._lock:
+                self._running_tasks.discard(sourceId)
+            return
+        sourceUrl, sourceName = claimed
 
-    def _task_wrapper(self, sourceId: int, sourceUrl: str, sourceName: str):
+        new_items = error = None
         try:
             # Import here to avoid circular imports at module level
             from etl.fetcher import processSource 
             
             print(f"Fetching source {sourceId} ({sourceName})...")
-            processSource(sourceId, sourceUrl, sourceName)
-            
-            self._update_last_fetch_time(sourceId)
+            new_items = processSource(sourceId, sourceUrl, sourceName)
+        except FeedFetchError as e:
+            error = str(e)
+            print(f"Error fetching source {sourceId}: {e}")
         except Exception as e:
             print(f"Error fetching source {sourceId}: {e}")
         finally:
+            self._finish_fetch(sourceId, new_items, error)
+
+    async def _async_task_wrapper(self, sourceId: int, force: bool = False):
+        new_items = error = None
+        try:
+            from etl.async_fetcher import processSourceAsync
+            
+            async with self._source_slots:
+                claimed = await asyncio.to_thread(self._claim, sourceId, force)
+                if not claimed:
+                    with self._lock:
+                        self._running_tasks.discard(sourceId)
+                    return
+                sourceUrl, sourceName = claimed
+                print(f"Fetching source {sourceId} ({sourceName})...")
+                new_items = await processSourceAsync(self._http, sourceId, sourceUrl, sourceName)
+        except asyncio.CancelledError:
             with self._lock:
                 self._running_tasks.discard(sourceId)
+                self._leased.discard(sourceId)
+            raise
+        except FeedFetchError as e:
+            error = str(e)
+            print(f"Error fetching source {sourceId}: {e}")
+        except Exception as e:
+            print(f"Error fetching source {sourceId}: {e}")
+        await asyncio.to_thread(self._finish_fetch, sourceId, new_items, error)
 
-    def _update_last_fetch_time(self, sourceId: int):
+    def _finish_fetch(self, sourceId: int, new_items: int = None, error: str = None):
+        """
+        Records the poll and puts the source back on the schedule (unless it was
+        stopped/deleted meanwhile): after a success its interval adapts to what the
+        poll found, after a feed failure it backs off (see retry_delay).
+        new_items None without an error means the feed came in but processing it
+        failed: retried at the usual interval, failure count and circuit untouched.
+        """
+        due = None
         db = ConfigSessionLocal()
         try:
-            updateSource(db, sourceId, SourceUpdate(lastFetchTime=datetime.utcnow()))
+            now = datetime.utcnow()
+            source = getSource(db, sourceId)
+            if source and error:
+                failures = (source.consecutiveFailures or 0) + 1
+                nextRetry = now + timedelta(minutes=retry_delay(current_interval(source), failures))
+                source = markSourceFailed(db, sourceId, now, failures, nextRetry, error)
+                if failures == SOURCE_CIRCUIT_THRESHOLD:
+                    print(f"Source {sourceId} failed {failures} times in a row, circuit open until {nextRetry}")
+            elif source and new_items is None:
+                # A pending backoff retry that was just used up moves one interval ahead, or it would fire again at once
+                nextRetry = now + timedelta(minutes=current_interval(source)) if source.nextRetryTime else None
+                source = markSourceProcessingFailed(db, sourceId, now, nextRetry, "Feed downloaded but processing failed")
+            elif source:
+                interval = adapt_interval(current_interval(source), new_items)
+                source = markSourceFetched(db, sourceId, now, interval)
+            if source and source.isActive:
+                due = self._next_due(source)
+        except Exception as e:
+            print(f"Error rescheduling source {sourceId}: {e}")
         finally:
             db.close()
+            with self._lock:
+                self._running_tasks.discard(sourceId)
+                self._leased.discard(sourceId)
+
+        if due is not None:
+            self._scheduler.schedule(sourceId, due)
 
 fetcherManager = FetcherManager()
\ No newline at end of file
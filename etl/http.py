@@ -0,0 +1,186 @@
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+import httpx
+
+# Shared HTTP settings for the fetcher (feeds, article pages, images)
+USER_AGENT = "Mozilla/5.0"
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "500"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "100"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "8"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+# Per-host circuit breaker (pages, images, feeds)
+HOST_BREAKER_THRESHOLD = int(os.getenv("HOST_BREAKER_THRESHOLD", "5"))      # consecutive failures to open
+HOST_BREAKER_COOLDOWN = float(os.getenv("HOST_BREAKER_COOLDOWN", "60"))     # seconds, doubles while the host stays down
+HOST_BREAKER_MAX_COOLDOWN = float(os.getenv("HOST_BREAKER_MAX_COOLDOWN", "1800"))
+# A half-open probe that never reports back (cancelled task, crash in between) stops blocking after this
+HOST_BREAKER_PROBE_TIMEOUT = float(os.getenv("HOST_BREAKER_PROBE_TIMEOUT", "120"))
+
+class FeedFetchError(Exception):
+    """The feed itself could not be downloaded (network error, bad status, host circuit open)."""
+
+def _http2_available() -> bool:
+    # httpx only speaks HTTP/2 when the 'h2' package is installed (httpx[http2])
+    if not HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+    )
+
+def host_key(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+# ------------------------------------------------------------------
+# SYNC CLIENT (thread mode)
+# One pooled client for every pool thread instead of a handshake per request.
+# ------------------------------------------------------------------
+_client = None
+_client_lock = threading.Lock()
+
+def get_client() -> httpx.Client:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(
+                    headers={"User-Agent": USER_AGENT},
+                    limits=_limits(),
+                    http2=_http2_available()
+                )
+    return _client
+
+def close_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+# ------------------------------------------------------------------
+# ASYNC CLIENT (async mode)
+# ------------------------------------------------------------------
+class AsyncHttp:
+    """
+    One long-lived httpx.AsyncClient (keep-alive, HTTP/2) shared by every
+    coroutine on the fetcher loop, with a connection cap per host so a few
+    hundred sources can be in flight without hammering any single site.
+    Must be started and used from the same event loop.
+    """
+    def __init__(self, max_per_host: int = HTTP_MAX_PER_HOST):
+        self._max_per_host = max_per_host
+        self._client: httpx.AsyncClient = None
+        self._host_slots: dict[str, asyncio.Semaphore] = {}
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers={"User-Agent": USER_AGENT},
+                limits=_limits(),
+                http2=_http2_available()
+            )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _slot(self, url: str) -> asyncio.Semaphore:
+        key = host_key(url)
+        slot = self._host_slots.get(key)
+        if slot is None:
+            slot = asyncio.Semaphore(self._max_per_host)
+            self._host_slots[key] = slot
+        return slot
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        async with self._slot(url):
+            return await self._client.get(url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs):
+        async with self._slot(url):
+            async with self._client.stream(method, url, **kwargs) as resp:
+                yield resp
+
+
+# ------------------------------------------------------------------
+# PER-HOST CIRCUIT BREAKER
+# ------------------------------------------------------------------
+class _HostState:
+    __slots__ = ("failures", "open_until", "probe_until")
+
+    def __init__(self):
+        self.failures = 0
+        self.open_until = 0.0
+        self.probe_until = 0.0   # a probe is in flight until then
+
+class HostBreaker:
+    """
+    Counts consecutive failures (connect errors, timeouts, 5xx) per host. After
+    HOST_BREAKER_THRESHOLD in a row the host is open: allow() refuses it without
+    touching the network until the cooldown passes, then lets a single probe
+    through (half-open). Success closes it, failure re-opens it with a longer cooldown.
+    A probe that never reports back is given up after HOST_BREAKER_PROBE_TIMEOUT.
+    In-memory and shared by both fetch modes and the image pipeline.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: dict[str, _HostState] = {}
+
+    def allow(self, url: str) -> bool:
+        with self._lock:
+            state = self._hosts.get(host_key(url))
+            if state is None or state.failures < HOST_BREAKER_THRESHOLD:
+                return True
+            now = time.monotonic()
+            if now < state.probe_until or now < state.open_until:
+                return False
+            state.probe_until = now + HOST_BREAKER_PROBE_TIMEOUT
+            return True
+
+    def record_response(self, url: str, status_code: int):
+        if status_code >= 500:
+            self._failure(url)
+        else:
+            # Any real answer (even a 404) means the host is up
+            with self._lock:
+                self._hosts.pop(host_key(url), None)
+
+    def record_error(self, url: str, error: BaseException):
+        if isinstance(error, httpx.TransportError):
+            self._failure(url)
+            return
+        # Not the host's fault (or the request was cancelled); just release a pending probe
+        with self._lock:
+            state = self._hosts.get(host_key(url))
+            if state is not None:
+                state.probe_until = 0.0
+
+    def _failure(self, url: str):
+        key = host_key(url)
+        with self._lock:
+            state = self._hosts.setdefault(key, _HostState())
+            state.failures += 1
+            state.probe_until = 0.0
+            failures = state.failures
+            if failures < HOST_BREAKER_THRESHOLD:
+                return
+            cooldown = min(HOST_BREAKER_COOLDOWN * 2 ** (failures - HOST_BREAKER_THRESHOLD), HOST_BREAKER_MAX_COOLDOWN)
+            state.open_until = time.monotonic() + cooldown
+        print(f"Circuit open for {key} ({failures} failures), retrying in {cooldown:.0f}s")
+
+hostBreaker = HostBreaker()
@@ -0,0 +1,172 @@
+import os
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from urllib.parse import urljoin
+
+from model.base import TodaySessionLocal
+from model.image import Image
+from core.notify import notify, IMAGE_CHANNEL
+from etl.http import host_key
+from etl.derivatives import derivativeWorker
+
+# Image download stage, fed by the extractor after articles are committed
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "16"))          # global concurrency cap
+IMAGE_PER_HOST = int(os.getenv("IMAGE_PER_HOST", "4"))         # per image host cap
+IMAGE_ARTICLE_BYTE_BUDGET = int(os.getenv("IMAGE_ARTICLE_BYTE_BUDGET", str(15 * 1024 * 1024)))
+IMAGE_MINUTE_BYTE_BUDGET = int(os.getenv("IMAGE_MINUTE_BYTE_BUDGET", str(300 * 1024 * 1024)))
+
+class ImagePipeline:
+    """
+    Queue + worker threads that download article images off the ingest path.
+    Limits: IMAGE_WORKERS downloads at once, IMAGE_PER_HOST per image host,
+    IMAGE_ARTICLE_BYTE_BUDGET bytes per article and IMAGE_MINUTE_BYTE_BUDGET
+    bytes per minute overall. Each article's Image rows are inserted in one
+    commit once all of its images are done.
+    """
+    def __init__(self, workers: int = IMAGE_WORKERS):
+        self._workers = workers
+        self._queue: queue.Queue = queue.Queue()
+        self._threads: list[threading.Thread] = []
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+        # image host -> downloads running / tasks waiting for a free slot on it
+        self._active: dict[str, int] = defaultdict(int)
+        self._parked: dict[str, deque] = defaultdict(deque)
+        # articleId -> remaining tasks / bytes spent / finished results
+        self._pending: dict[int, int] = defaultdict(int)
+        self._spent: dict[int, int] = defaultdict(int)
+        self._results: dict[int, list] = defaultdict(list)
+        # Per-minute window
+        self._window_start = time.monotonic()
+        self._window_bytes = 0
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            self._stop_event.clear()
+            for i in range(self._workers):
+                t = threading.Thread(target=self._run, name=f"image-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def stop(self):
+        self._stop_event.set()
+        for t in self._threads:
+            t.join()
+        self._threads = []
+        derivativeWorker.stop()
+
+    def submit(self, articleId: int, article_url: str, srcs: list[str]):
+        """Queues an article's image srcs (page order). Returns immediately."""
+        if not srcs:
+            return
+        self.start()
+        with self._lock:
+            self._pending[articleId] += len(srcs)
+        for position, src in enumerate(srcs):
+            self._queue.put((articleId, article_url, position, src))
+
+    def _wait_for_minute_budget(self):
+        while not self._stop_event.is_set():
+            with self._lock:
+                now = time.monotonic()
+                if now - self._window_start >= 60:
+                    self._window_start = now
+                    self._window_bytes = 0
+                if self._window_bytes < IMAGE_MINUTE_BYTE_BUDGET:
+                    return
+                wait = 60 - (now - self._window_start)
+            time.sleep(min(wait, 1.0))
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                task = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+
+            # Cap per host the image is actually served from (often a CDN shared by many sites)
+            articleId, article_url, position, src = task
+            key = host_key(urljoin(article_url, src))
+            with self._lock:
+                if self._active[key] >= IMAGE_PER_HOST:
+                    # Host saturated: park it; a worker finishing on that host picks it up
+                    self._parked[key].append(task)
+                    continue
+                self._active[key] += 1
+
+            while task is not None:
+                self._download(task)
+                with self._lock:
+                    # Hand the slot straight to the next parked task for this host
+                    if self._parked[key] and not self._stop_event.is_set():
+                        task = self._parked[key].popleft()
+                    else:
+                        task = None
+                        self._parked.pop(key, None)
+                        self._active[key] -= 1
+                        if not self._active[key]:
+                            del self._active[key]
+
+    def _download(self, task):
+        from etl.fetcher import download_and_save_image
+
+        articleId, article_url, position, src = task
+        result = None
+        try:
+            with self._lock:
+                remaining = IMAGE_ARTICLE_BYTE_BUDGET - self._spent[articleId]
+            if remaining > 0:
+                self._wait_for_minute_budget()
+                result = download_and_save_image(src, article_url, max_bytes=remaining)
+                if result:
+                    # Counts the transfer even when the blob was already stored
+                    size = os.path.getsize(result[0])
+                    with self._lock:
+                        self._spent[articleId] += size
+                        self._window_bytes += size
+        except Exception as e:
+            print(f"Image pipeline error: {e}")
+
+        self._finish(articleId, position, result)
+
+    def _finish(self, articleId: int, position: int, result):
+        with self._lock:
+            if result:
+                self._results[articleId].append((position, result))
+            self._pending[articleId] -= 1
+            if self._pending[articleId] > 0:
+                return
+            results = self._results.pop(articleId, [])
+            self._pending.pop(articleId, None)
+            self._spent.pop(articleId, None)
+
+        if results:
+            # Keep page order so the lead image stays first
+            self._save(articleId, [result for _, result in sorted(results)])
+
+    def _save(self, articleId: int, results: list):
+        db = TodaySessionLocal()
+        try:
+            db.add_all([
+                Image(articleId=articleId, localPath=local_path, originalUrl=original_url, contentHash=content_hash)
+                for local_path, web_path, original_url, content_hash in results
+            ])
+            notify(db, IMAGE_CHANNEL)   # vision worker
+            db.commit()
+        except Exception as e:
+            # Blobs may be shared with other articles, so they stay on disk
+            print(f"Failed to save images for article {articleId}: {e}")
+            db.rollback()
+            return
+        finally:
+            db.close()
+
+        for local_path, web_path, original_url, content_hash in results:
+            derivativeWorker.submit(local_path)
+
+imagePipeline = ImagePipeline()
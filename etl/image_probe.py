@@ -0,0 +1,67 @@
+import os
+import struct
+
+# Pixel size from the first bytes of an image, so junk (tracking pixels, thin
+# banners, thumbnails) can be dropped before the rest of it is downloaded.
+MIN_IMAGE_WIDTH = int(os.getenv("MIN_IMAGE_WIDTH", "300"))
+MIN_IMAGE_HEIGHT = int(os.getenv("MIN_IMAGE_HEIGHT", "200"))
+MAX_IMAGE_ASPECT = float(os.getenv("MAX_IMAGE_ASPECT", "3.0"))   # long side / short side
+# Give up probing after this many bytes (JPEG EXIF/ICC blocks can push SOF far out)
+IMAGE_PROBE_BYTES = int(os.getenv("IMAGE_PROBE_BYTES", str(64 * 1024)))
+
+# JPEG start-of-frame markers (carry the size); C4/C8/CC are DHT/JPG/DAC
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+def _jpeg_size(data: bytes):
+    i = 2
+    while i + 9 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:          # fill byte
+            i += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:   # no length field
+            i += 2
+            continue
+        length = struct.unpack(">H", data[i + 2:i + 4])[0]
+        if marker in _SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[i + 5:i + 9])
+            return width, height
+        i += 2 + length
+    return None
+
+def _png_size(data: bytes):
+    if len(data) >= 24 and data[12:16] == b"IHDR":
+        return struct.unpack(">II", data[16:24])
+    return None
+
+def _webp_size(data: bytes):
+    if len(data) < 30:
+        return None
+    chunk = data[12:16]
+    if chunk == b"VP8 " and data[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and data[20] == 0x2F:
+        bits = int.from_bytes(data[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        return int.from_bytes(data[24:27], "little") + 1, int.from_bytes(data[27:30], "little") + 1
+    return None
+
+def probe_size(data: bytes) -> tuple[int, int]:
+    """Returns: (width, height) from the image header, or None if unknown / not enough bytes yet."""
+    if data[:3] == b"\xff\xd8\xff":
+        return _jpeg_size(data)
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return _png_size(data)
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return _webp_size(data)
+    return None
+
+def is_wanted_size(width: int, height: int) -> bool:
+    """False for images too small or too elongated to be an article photo."""
+    if width < MIN_IMAGE_WIDTH or height < MIN_IMAGE_HEIGHT:
+        return False
+    return max(width, height) / max(min(width, height), 1) <= MAX_IMAGE_ASPECT
@@ -0,0 +1,46 @@
+import hashlib
+import os
+import uuid
+
+# Content-addressed image store: every unique blob is written once at
+# images/<h[:2]>/<h[2:4]>/<sha256><ext>, so identical photos share one file.
+IMAGES_ROOT = "images"
+TMP_DIR = os.path.join(IMAGES_ROOT, "tmp")
+
+def content_path(content_hash: str, ext: str) -> tuple[str, str]:
+    """Returns: (local_path, web_path) for a blob."""
+    rel = f"{content_hash[:2]}/{content_hash[2:4]}/{content_hash}{ext}"
+    return os.path.join(IMAGES_ROOT, *rel.split("/")), f"/static/images/{rel}"
+
+def derivative_path(local_path: str, name: str) -> str:
+    """Downscaled WebP copy stored next to an image (see etl/derivatives.py)."""
+    return f"{os.path.splitext(local_path)[0]}_{name}.webp"
+
+def derivative_url(local_path: str, name: str) -> str:
+    """Web path of a derivative (images/ is mounted at /static/images)."""
+    return "/static/" + derivative_path(local_path, name).replace(os.sep, "/")
+
+def temp_path() -> str:
+    os.makedirs(TMP_DIR, exist_ok=True)
+    return os.path.join(TMP_DIR, f"{uuid.uuid4()}.part")
+
+def commit_temp_file(tmp_path: str, content_hash: str, ext: str) -> tuple[str, str]:
+    """Moves a fully written temp file to its content address (or drops it if the blob exists)."""
+    local_path, web_path = content_path(content_hash, ext)
+    if os.path.exists(local_path):
+        os.remove(tmp_path)
+    else:
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        os.replace(tmp_path, local_path)
+    return local_path, web_path
+
+def store_bytes(data: bytes, ext: str) -> tuple[str, str]:
+    """Stores in-memory image bytes. Returns: (local_path, content_hash)"""
+    content_hash = hashlib.sha256(data).hexdigest()
+    local_path, _ = content_path(content_hash, ext)
+    if not os.path.exists(local_path):
+        tmp = temp_path()
+        with open(tmp, "wb") as f:
+            f.write(data)
+        commit_temp_file(tmp, content_hash, ext)
+    return local_path, content_hash
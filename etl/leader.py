@@ -0,0 +1,78 @@
+import os
+import socket
+import threading
+import time
+
+from model.base import ConfigSessionLocal
+from crud.lease import acquireLease, releaseLease
+
+# Identifies this process in source/job/leader leases
+INSTANCE_ID = os.getenv("INSTANCE_ID") or f"{socket.gethostname()}:{os.getpid()}"
+# A dead leader is replaced after at most this long; the holder renews every third of it
+LEADER_LEASE_SECONDS = float(os.getenv("LEADER_LEASE_SECONDS", "60"))
+
+class LeaderJob:
+    """
+    Runs fn every `interval` seconds on exactly one of the running instances: the
+    one holding the `name` row of the lease table. Every instance runs a LeaderJob
+    thread; the others just keep trying to take the lease in case the holder dies.
+    fn should be idempotent and finish well within LEADER_LEASE_SECONDS.
+    """
+    def __init__(self, name: str, interval: float, fn):
+        self.name = name
+        self._interval = interval
+        self._fn = fn
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.isLeader = False
+
+    def start(self):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name=f"leader-{self.name}")
+            self._thread.start()
+
+    def stop(self):
+        if self._thread:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+            if self.isLeader:
+                # Hand over right away instead of making the others wait out the lease
+                db = ConfigSessionLocal()
+                try:
+                    releaseLease(db, self.name, INSTANCE_ID)
+                except Exception as e:
+                    print(f"Could not release lease {self.name}: {e}")
+                finally:
+                    db.close()
+                self.isLeader = False
+
+    def _renew(self) -> bool:
+        db = ConfigSessionLocal()
+        try:
+            return acquireLease(db, self.name, INSTANCE_ID, LEADER_LEASE_SECONDS)
+        except Exception as e:
+            print(f"Lease {self.name} check failed: {e}")
+            return False
+        finally:
+            db.close()
+
+    def _run(self):
+        next_run = 0.0
+        while not self._stop_event.is_set():
+            leader = self._renew()
+            if leader != self.isLeader:
+                print(f"{INSTANCE_ID} {'took' if leader else 'lost'} the {self.name} lease")
+                self.isLeader = leader
+            if leader and time.time() >= next_run:
+                try:
+                    self._fn()
+                except Exception as e:
+                    print(f"{self.name} failed: {e}")
+                next_run = time.time() + self._interval
+
+            wait = LEADER_LEASE_SECONDS / 3
+            if leader:
+                wait = min(wait, max(next_run - time.time(), 0.1))
+            self._stop_event.wait(wait)
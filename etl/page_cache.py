@@ -0,0 +1,128 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+# Raw article HTML, kept so extraction can be re-run without refetching (see reprocess.py).
+# One gzip file per URL at cache/pages/<h[:2]>/<sha256(url)>.html.gz: a JSON header
+# line (url, encoding, fetchedAt) followed by the page bytes.
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "true").lower() == "true"
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR", os.path.join("cache", "pages"))
+PAGE_CACHE_MAX_MB = int(os.getenv("PAGE_CACHE_MAX_MB", "2048"))
+PAGE_CACHE_MAX_AGE_DAYS = float(os.getenv("PAGE_CACHE_MAX_AGE_DAYS", "30"))
+PAGE_CACHE_LEVEL = int(os.getenv("PAGE_CACHE_LEVEL", "6"))   # gzip level
+
+def url_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+def read_entry(path: str) -> tuple[dict, bytes]:
+    """Returns: (header dict, raw page bytes) of one cache file."""
+    with gzip.open(path, "rb") as f:
+        header = json.loads(f.readline())
+        return header, f.read()
+
+class PageCache:
+    """
+    Size-capped, age-limited store of raw pages. Reads touch the file's mtime, so
+    when the cap is hit the least recently used pages go first. The directory is
+    swept after every ~5% of the cap written, not on every put.
+    """
+    def __init__(self, root: str = PAGE_CACHE_DIR, max_mb: int = PAGE_CACHE_MAX_MB, max_age_days: float = PAGE_CACHE_MAX_AGE_DAYS):
+        self.root = root
+        self._max_bytes = max_mb * 1024 * 1024
+        self._max_age = max_age_days * 86400
+        self._lock = threading.Lock()
+        self._written_since_sweep = 0
+        self._sweeping = False
+
+    def path_for(self, url: str) -> str:
+        key = url_key(url)
+        return os.path.join(self.root, key[:2], f"{key}.html.gz")
+
+    def put(self, url: str, content: bytes, encoding: str = None):
+        if not PAGE_CACHE_ENABLED or not content:
+            return
+        path = self.path_for(url)
+        tmp = f"{path}.{uuid.uuid4().hex}.part"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            header = {"url": url, "encoding": encoding, "fetchedAt": time.time()}
+            with gzip.open(tmp, "wb", compresslevel=PAGE_CACHE_LEVEL) as f:
+                f.write(json.dumps(header).encode("utf-8") + b"\n")
+                f.write(content)
+            os.replace(tmp, path)
+            size = os.path.getsize(path)
+        except OSError as e:
+            print(f"Page cache write failed for {url}: {e}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+
+        with self._lock:
+            self._written_since_sweep += size
+            if self._sweeping or self._written_since_sweep < self._max_bytes // 20:
+                return
+            self._sweeping = True
+            self._written_since_sweep = 0
+        try:
+            self.evict()
+        finally:
+            self._sweeping = False
+
+    def get(self, url: str) -> tuple[bytes, str]:
+        """Returns: (raw page bytes, encoding) or None."""
+        path = self.path_for(url)
+        try:
+            header, content = read_entry(path)
+            os.utime(path)
+        except (OSError, ValueError, EOFError):
+            return None
+        return content, header.get("encoding")
+
+    def iter_paths(self):
+        if not os.path.isdir(self.root):
+            return
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".html.gz"):
+                    yield entry.path
+
+    def evict(self) -> int:
+        """Drops pages older than max_age, then least recently used ones until under the cap. Returns: files removed."""
+        now = time.time()
+        entries = []
+        removed = 0
+        for path in self.iter_paths():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if now - st.st_mtime > self._max_age:
+                removed += self._remove(path)
+            else:
+                entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        if total > self._max_bytes:
+            for _, size, path in sorted(entries):
+                removed += self._remove(path)
+                total -= size
+                if total <= self._max_bytes:
+                    break
+        if removed:
+            print(f"Page cache: evicted {removed} pages")
+        return removed
+
+    def _remove(self, path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
+
+pageCache = PageCache()
@@ -0,0 +1,88 @@
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime, timezone
+
+def to_epoch(dt: datetime) -> float:
+    """Naive UTC datetime (as stored in the DB) -> epoch seconds."""
+    return dt.replace(tzinfo=timezone.utc).timestamp()
+
+class SourceScheduler:
+    """
+    Min-heap of (due_time, seq, source_id). Rescheduling or removing a source
+    just supersedes its entry (stale entries are skipped on pop), so every
+    update is O(log n) and the manager sleeps exactly until the next deadline.
+    An entry can be `forced` (manual start): polled when popped even if the DB
+    says it isn't due yet.
+    """
+    def __init__(self):
+        self._heap: list[tuple[float, int, int]] = []
+        self._entries: dict[int, int] = {}   # source_id -> seq of its live entry
+        self._forced: set[int] = set()       # source_ids whose live entry is forced
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def schedule(self, source_id: int, due: float, force: bool = False):
+        """(Re)schedules a source at epoch time `due`, replacing any earlier entry."""
+        with self._cond:
+            seq = next(self._seq)
+            self._entries[source_id] = seq
+            if force:
+                self._forced.add(source_id)
+            else:
+                self._forced.discard(source_id)
+            heapq.heappush(self._heap, (due, seq, source_id))
+            # Wake the waiter in case this is the new earliest deadline
+            self._cond.notify_all()
+
+    def remove(self, source_id: int):
+        with self._cond:
+            self._entries.pop(source_id, None)
+            self._forced.discard(source_id)
+
+    def clear(self):
+        with self._cond:
+            self._heap = []
+            self._entries = {}
+            self._forced = set()
+            self._cond.notify_all()
+
+    def wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def _drop_stale(self):
+        while self._heap and self._entries.get(self._heap[0][2]) != self._heap[0][1]:
+            heapq.heappop(self._heap)
+
+    def wait_due(self, stop_event: threading.Event, max_wait: float = None) -> list[tuple[int, bool]]:
+        """
+        Blocks until at least one source is due, max_wait passes, or wake() is called
+        with stop_event set. Returns (source_id, forced) of the due sources, removed from the schedule.
+        """
+        deadline = time.time() + max_wait if max_wait is not None else None
+        with self._cond:
+            while not stop_event.is_set():
+                self._drop_stale()
+                now = time.time()
+                if self._heap and self._heap[0][0] <= now:
+                    due = []
+                    while self._heap and self._heap[0][0] <= now:
+                        _, seq, source_id = heapq.heappop(self._heap)
+                        if self._entries.get(source_id) == seq:
+                            del self._entries[source_id]
+                            due.append((source_id, source_id in self._forced))
+                            self._forced.discard(source_id)
+                    return due
+                if deadline is not None and now >= deadline:
+                    return []
+
+                waits = []
+                if self._heap: waits.append(self._heap[0][0] - now)
+                if deadline is not None: waits.append(deadline - now)
+                self._cond.wait(min(waits) if waits else None)
+            return []
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,67 @@
+import os
+import threading
+from collections import OrderedDict
+
+from core.metrics import metrics
+from etl.http import host_key
+from etl.extractor import BODY_SELECTOR
+
+# Container selector that last worked per host, tried first on the next page.
+# 0 disables the cache.
+SELECTOR_CACHE_SIZE = int(os.getenv("SELECTOR_CACHE_SIZE", "10000"))
+
+class SelectorCache:
+    """
+    Thread-safe, bounded LRU of host -> container selector (see etl.extractor).
+    Outcomes are counted as extractor.selector_hit / _miss / _cold, and the
+    hit rate is exposed as the extractor.selector_hit_rate gauge.
+    """
+    def __init__(self, maxsize: int = SELECTOR_CACHE_SIZE):
+        self._maxsize = maxsize
+        self._selectors: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> str:
+        if self._maxsize <= 0:
+            return None
+        key = host_key(url)
+        with self._lock:
+            selector = self._selectors.get(key)
+            if selector is not None:
+                self._selectors.move_to_end(key)
+            return selector
+
+    def record(self, url: str, hint: str, selector: str):
+        """Stores the selector that won for this page and counts whether the hint was right."""
+        if self._maxsize <= 0:
+            return
+        if hint is None:
+            metrics.incr("extractor.selector_cold")
+        elif hint == selector:
+            metrics.incr("extractor.selector_hit")
+            return
+        else:
+            metrics.incr("extractor.selector_miss")
+
+        key = host_key(url)
+        with self._lock:
+            if selector == BODY_SELECTOR:
+                # Whole-body fallback isn't worth remembering: search fully next time
+                self._selectors.pop(key, None)
+                return
+            self._selectors[key] = selector
+            self._selectors.move_to_end(key)
+            while len(self._selectors) > self._maxsize:
+                self._selectors.popitem(last=False)
+
+    def hit_rate(self) -> float:
+        hits = metrics.get("extractor.selector_hit")
+        total = hits + metrics.get("extractor.selector_miss") + metrics.get("extractor.selector_cold")
+        return round(hits / total, 4) if total else None
+
+    def __len__(self):
+        return len(self._selectors)
+
+selectorCache = SelectorCache()
+metrics.gauge("extractor.selector_hit_rate", selectorCache.hit_rate)
+metrics.gauge("extractor.selector_hosts", lambda: len(selectorCache))
@@ -0,0 +1,41 @@
+import os
+import threading
+from collections import OrderedDict
+
+# Recently seen article URLs, so steady-state polls skip the DB lookup entirely.
+# 0 disables the cache.
+URL_CACHE_SIZE = int(os.getenv("URL_CACHE_SIZE", "50000"))
+
+class RecentUrlCache:
+    """Thread-safe, bounded LRU set of URLs known to exist in the article table."""
+    def __init__(self, maxsize: int = URL_CACHE_SIZE):
+        self._maxsize = maxsize
+        self._urls: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def split(self, urls) -> tuple[set, list]:
+        """Returns: (urls already known, urls that still need a DB lookup)"""
+        known, unknown = set(), []
+        with self._lock:
+            for url in urls:
+                if url in self._urls:
+                    self._urls.move_to_end(url)
+                    known.add(url)
+                else:
+                    unknown.append(url)
+        return known, unknown
+
+    def add_many(self, urls):
+        if self._maxsize <= 0:
+            return
+        with self._lock:
+            for url in urls:
+                self._urls[url] = None
+                self._urls.move_to_end(url)
+            while len(self._urls) > self._maxsize:
+                self._urls.popitem(last=False)
+
+    def __len__(self):
+        return len(self._urls)
+
+recentUrls = RecentUrlCache()
@@ -114,7 +114,7 @@ const ImageCarousel = ({ images, index, setIndex, onEdit, refreshKey }) => {
             <div style={{ position: 'relative', marginBottom: '2.5rem', borderRadius: '16px', overflow: 'hidden', bg: '#000', border: '1px solid var(--glass-border)' }}>
                 <div style={{ height: '400px', display: 'flex', alignItems: 'center', justifyContent: 'center', background: 'rgba(0,0,0,0.5)', position: 'relative' }}>
                     <img
-                        src={`${API_URL}/static/${img.localPath}?t=${new Date(img.updatedAt || img.createdAt).getTime()}&r=${refreshKey}`}
+                        src={`${API_URL}${img.mediumUrl || `/static/${img.localPath}`}?t=${new Date(img.updatedAt || img.createdAt).getTime()}&r=${refreshKey}`}
                         alt="Gallery"
                         style={{ maxHeight: '100%', maxWidth: '100%', objectFit: 'contain', cursor: 'pointer' }}
                         onClick={() => setIsLightbox(true)}
@@ -348,7 +348,7 @@ export default function ArticleViewer({ article }) {
                         >
                             <div style={{ width: '60px', height: '60px', flexShrink: 0 }}>
                                 <img
-                                    src={`${API_URL}/static/${img.localPath}?t=${new Date(img.updatedAt || img.createdAt).getTime()}&r=${refreshKey}`}
+                                    src={`${API_URL}${img.thumbUrl || `/static/${img.localPath}`}?t=${new Date(img.updatedAt || img.createdAt).getTime()}&r=${refreshKey}`}
                                     style={{ width: '100%', height: '100%', objectFit: 'cover', borderRadius: '8px' }}
                                     alt="thumb"
                                 />
@@ -1,3 +1,4 @@
+from sqlalchemy import inspect, text
 from model.base import Base, engine
 # Import all models so they are registered with Base metadata
 from model.source import Source
@@ -5,19 +6,45 @@ from model.user import User
 from model.job import Job
 from model.article import Article
 from model.image import Image  # <--- Added this
+from model.lease import Lease
+from model.summary_cache import SummaryCache
+
+def add_missing_columns():
+    """create_all() never alters existing tables, so add any model columns/indexes they lack."""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {ddl}'))
+                print(f"Added column {table.name}.{column.name}")
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+
+def drop_legacy_constraints():
+    with engine.begin() as conn:
+        # Images are content-addressed now; many rows can share one localPath
+        conn.execute(text('ALTER TABLE image DROP CONSTRAINT IF EXISTS "image_localPath_key"'))
 
 def init_db():
     print("Initializing PostgreSQL Database...")
     
     # Create all tables in the unified database
     Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    drop_legacy_constraints()
     
     # Also create the article_images directory if it doesn't exist
     import os
     os.makedirs("images", exist_ok=True)
     
     print("Database initialization complete.")
-    print("Tables created: Source, User, Job, Article, Image")
+    print("Tables created: Source, User, Job, Article, Image, Lease, SummaryCache")
     
 if __name__ == "__main__":
     init_db()
\ No newline at end of file
@@ -4,12 +4,15 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from web.app import app
 from etl.fetcher_manager import fetcherManager
+from summarizer.job_lease import reap_stuck_jobs, JOB_REAPER_INTERVAL_SECONDS, JOB_REAPER_LEASE
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print("Starting System...")
+    # Requeues summary jobs whose worker died (one instance runs it, see etl/leader.py)
+    fetcherManager.add_leader_job(JOB_REAPER_LEASE, JOB_REAPER_INTERVAL_SECONDS, reap_stuck_jobs)
     fetcherManager.start()
     
     # Optional: Start Summarizer in a thread for all-in-one convenience
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, ForeignKey, Boolean
 from datetime import datetime
 from model.base import Base
 from sqlalchemy.orm import relationship
@@ -17,6 +17,14 @@ class Article(Base):
     sourceName = Column(String, index=True, nullable=False)
     isSummarized = Column(Boolean, default=False)
     summary = Column(Text, nullable=True)
+    # Near-duplicate detection (core/simhash.py): 64-bit SimHash + its four 16-bit bands for lookup.
+    # Copies of a story point at the first one seen and reuse its summary.
+    simhash = Column(BigInteger, nullable=True)
+    simBand0 = Column(Integer, index=True, nullable=True)
+    simBand1 = Column(Integer, index=True, nullable=True)
+    simBand2 = Column(Integer, index=True, nullable=True)
+    simBand3 = Column(Integer, index=True, nullable=True)
+    canonicalArticleId = Column(Integer, ForeignKey("article.id", ondelete="SET NULL"), index=True, nullable=True)
     createdAt = Column(DateTime, default=datetime.utcnow)
     updatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -9,8 +9,11 @@ class Image(Base):
     id = Column(Integer, primary_key=True, index=True)
     articleId = Column(Integer, ForeignKey("article.id"), nullable=False)
     
-    localPath = Column(String, unique=True, nullable=False)
+    # Content-addressed: several rows may point at the same blob
+    localPath = Column(String, nullable=False)
     originalUrl = Column(String, nullable=True)
+    contentHash = Column(String(64), index=True, nullable=True)  # sha256 of the file
+    derivativesReady = Column(Boolean, default=False)  # thumb/medium WebP copies exist (etl/derivatives.py)
     
     # --- NEW VISION COLUMNS ---
     analysis = Column(Text, nullable=True)     # The description (e.g. "A red car...")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Enum, Index, text
 from datetime import datetime
 import enum
 from model.base import Base
@@ -16,5 +16,16 @@ class Job(Base):
     articleUrl = Column(String, index=True)
     status = Column(String, default=JobStatus.PENDING)
     retryCount = Column(Integer, default=0)
+    # Lease of the worker processing it; an expired lease means the worker died (see summarizer/job_lease.py)
+    workerId = Column(String, nullable=True)
+    leasedUntil = Column(DateTime, nullable=True)
+    availableAt = Column(DateTime, nullable=True)   # not claimable before this (retry backoff)
     createdAt = Column(DateTime, default=datetime.utcnow)
-    updatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    updatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Only the queue head is ever scanned by claimJobs, however big the table gets
+        Index("ix_job_pending_createdAt", "createdAt", postgresql_where=text("status = 'PENDING'")),
+        # The reaper's scan for leases that ran out
+        Index("ix_job_processing_leasedUntil", "leasedUntil", postgresql_where=text("status = 'PROCESSING'")),
+    )
\ No newline at end of file
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, DateTime
+from model.base import Base
+
+class Lease(Base):
+    """Named lease held by one app instance at a time (leader election for singleton jobs)."""
+
+    __tablename__ = "lease"
+
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)      # INSTANCE_ID of the holder
+    expiresAt = Column(DateTime, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float
 from datetime import datetime
 from model.base import Base
 
@@ -13,6 +13,18 @@ class Source(Base):
     language = Column(String, default="tr")  # e.g. "tr", "en"
     isActive = Column(Boolean, default=True)
     fetchIntervalMinutes = Column(Integer, default=60) # Polling interval
+    effectiveIntervalMinutes = Column(Float, nullable=True) # Adapted to the publish rate (None = fetchIntervalMinutes)
     lastFetchTime = Column(DateTime, nullable=True)
+    # Conditional GET / fingerprint of the last processed feed body
+    etag = Column(String, nullable=True)
+    lastModified = Column(String, nullable=True)
+    feedHash = Column(String(64), nullable=True)
+    # Failure tracking: backoff / circuit breaker state survives restarts
+    consecutiveFailures = Column(Integer, default=0)
+    nextRetryTime = Column(DateTime, nullable=True)
+    lastError = Column(String, nullable=True)
+    # Held by the app instance currently polling the source (see FetcherManager._claim)
+    leaseOwner = Column(String, nullable=True)
+    leaseExpiresAt = Column(DateTime, nullable=True)
     createdAt = Column(DateTime, default=datetime.utcnow)
     updatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, Text, DateTime
+from datetime import datetime
+from model.base import Base
+
+class SummaryCache(Base):
+    """LLM summaries by content hash, so identical text is only summarized once."""
+
+    __tablename__ = "summary_cache"
+
+    key = Column(String(64), primary_key=True)  # sha256 of normalized content + model + prompt version
+    summary = Column(Text, nullable=False)
+    model = Column(String, nullable=True)
+    createdAt = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,86 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+sys.path.append(os.getcwd())
+
+from etl.page_cache import pageCache, read_entry
+from etl.extractor import extract_article_content, EXTRACTOR_ENGINE
+
+# Re-runs article extraction over the raw page cache (etl/page_cache.py), no network.
+# Only article text is updated; images and summaries are left as they are.
+#   python reprocess.py                      # dry run: how many articles would change
+#   python reprocess.py --apply              # write the new text
+#   python reprocess.py --engine lxml --processes 8
+
+BATCH_SIZE = 500
+
+def reextract(path: str, engine: str):
+    """Worker (runs in a child process). Returns: (url, text) or None if unreadable."""
+    try:
+        header, content = read_entry(path)
+        text, _ = extract_article_content(content, header["url"], encoding=header.get("encoding"), engine=engine)
+        return header["url"], text
+    except Exception as e:
+        print(f"Skipping {path}: {e}")
+        return None
+
+def flush(batch: dict, apply: bool) -> tuple[int, int]:
+    """Compares a batch of {url: text} with the DB. Returns: (matched articles, changed articles)"""
+    from model.base import TodaySessionLocal
+    from crud.article import getArticleContentsByUrl, bulkUpdateArticleContent
+
+    db = TodaySessionLocal()
+    try:
+        stored = getArticleContentsByUrl(db, list(batch.keys()))
+        changed = {
+            articleId: batch[url]
+            for url, (articleId, content) in stored.items()
+            # Never replace text with nothing
+            if batch[url] and batch[url] != content
+        }
+        if apply:
+            bulkUpdateArticleContent(db, changed)
+        return len(stored), len(changed)
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-extract articles from the raw page cache")
+    parser.add_argument("--apply", action="store_true", help="write changed text to the DB (default: dry run)")
+    parser.add_argument("--engine", default=EXTRACTOR_ENGINE, help="extractor engine (bs4/lxml)")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    paths = list(pageCache.iter_paths())
+    print(f"Reprocessing {len(paths)} cached pages with {args.processes} processes ({args.engine})...")
+
+    started = time.perf_counter()
+    pages = matched = changed = 0
+    batch = {}
+    with ProcessPoolExecutor(max_workers=args.processes) as pool:
+        for result in pool.map(partial(reextract, engine=args.engine), paths, chunksize=64):
+            pages += 1
+            if result:
+                url, text = result
+                batch[url] = text
+            if len(batch) >= BATCH_SIZE:
+                m, c = flush(batch, args.apply)
+                matched += m
+                changed += c
+                batch = {}
+    if batch:
+        m, c = flush(batch, args.apply)
+        matched += m
+        changed += c
+
+    elapsed = time.perf_counter() - started
+    rate = pages / elapsed * 60 if elapsed else 0
+    print(f"{pages} pages in {elapsed:.1f}s ({rate:.0f}/min), {matched} matched articles, "
+          f"{changed} {'updated' if args.apply else 'would change'}")
+
+if __name__ == "__main__":
+    main()
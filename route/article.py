@@ -85,31 +85,24 @@ async def update_image_content(image_id: int, file: UploadFile = File(...), db:
     if not db_image:
         raise HTTPException(status_code=404, detail="Image not found")
     
-    # Path resolution:
-    # DB stores 'images/filename.jpg'. 
-    # The file system root has 'images/' folder.
-    # web/app.py mounts '/static/images' -> './images'.
-    
-    path = db_image.localPath
-    # Clean path if it has leading / or static/
-    if path.startswith("/"): path = path[1:]
-    if path.startswith("static/"): path = path.replace("static/", "", 1)
-    
-    file_location = path
-    
-    # Ensure directory exists
+    # Blobs are content-addressed and may be shared with other articles,
+    # so new content is stored as its own blob and this row is repointed.
     import os
-    os.makedirs(os.path.dirname(file_location), exist_ok=True)
+    from etl.image_store import store_bytes
+    from etl.derivatives import derivativeWorker
     
+    ext = os.path.splitext(db_image.localPath)[1] or ".jpg"
     content = await file.read()
-    with open(file_location, "wb+") as file_object:
-        file_object.write(content)
+    db_image.localPath, db_image.contentHash = store_bytes(content, ext)
+    db_image.derivativesReady = False
         
     # Update timestamp
     db_image.updatedAt = datetime.utcnow()
     db.commit()
     db.refresh(db_image)
     
+    # Thumbnails are built in the background; the response falls back to the original until then
+    derivativeWorker.submit(db_image.localPath)
     return db_image
 
 @router.post("/{article_id}/image", response_model=ImageResponse)
@@ -118,37 +111,29 @@ async def upload_article_image(article_id: int, file: UploadFile = File(...), db
     if not db_article:
         raise HTTPException(status_code=404, detail="Article not found")
         
-    import uuid
     import os
+    from etl.image_store import store_bytes
+    from etl.derivatives import derivativeWorker
     
-    # Generate unique filename
     ext = os.path.splitext(file.filename)[1]
     if not ext:
         ext = ".jpg"
-    filename = f"{uuid.uuid4()}{ext}"
-    
-    # Define relative and absolute paths
-    # We follow the convention: 'images/filename' stored in DB
-    relative_path = f"images/{filename}"
-    
-    # Note: 'images/' folder at root is mounted to /static/images
-    file_location = relative_path
-    
-    # Ensure directory
-    os.makedirs(os.path.dirname(file_location), exist_ok=True)
     
+    # Stored under its content address ('images/..' in DB, mounted at /static/images)
     content = await file.read()
-    with open(file_location, "wb+") as file_object:
-        file_object.write(content)
+    relative_path, content_hash = store_bytes(content, ext)
         
     # Create DB record
     image_data = ImageCreate(
         localPath=relative_path,
         originalUrl="", # Maybe we should store something indicating source?
-        isAnalyzed=False
+        isAnalyzed=False,
+        contentHash=content_hash
     )
     
-    return createImage(db, image_data, article_id)
+    db_image = createImage(db, image_data, article_id)
+    derivativeWorker.submit(db_image.localPath)
+    return db_image
 
 @router.post("/image/{image_id}/process")
 def process_image_endpoint(
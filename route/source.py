@@ -29,7 +29,9 @@ def get_source(source_id: int, db: Session = Depends(get_config_db)):
 
 @router.post("/", response_model=SourceResponse)
 def create_new_source(source: SourceCreate, db: Session = Depends(get_config_db)):
-    return createSource(db, source)
+    db_source = createSource(db, source)
+    fetcherManager.schedule_source(db_source)
+    return db_source
 
 @router.put("/{source_id}", response_model=SourceResponse)
 def update_existing_source(source_id: int, source_update: SourceUpdate, db: Session = Depends(get_config_db)):
@@ -37,13 +39,13 @@ def update_existing_source(source_id: int, source_update: SourceUpdate, db: Sess
     if not db_source:
         raise HTTPException(status_code=404, detail="Source not found")
     
-    # If fetchInterval changed or isActive changed, we might want to notify Manager?
-    # For now, Manager polls DB regularly so it picks up changes automatically.
-    # But if specifically Toggled Active:
+    # Keep the manager's in-memory schedule in sync
     if source_update.isActive is True:
         fetcherManager.start_source(source_id)
     elif source_update.isActive is False:
         fetcherManager.stop_source(source_id)
+    elif source_update.fetchIntervalMinutes is not None:
+        fetcherManager.schedule_source(db_source)
         
     return db_source
 
@@ -52,7 +54,7 @@ def delete_existing_source(source_id: int, db: Session = Depends(get_config_db))
     db_source = deleteSource(db, source_id)
     if not db_source:
         raise HTTPException(status_code=404, detail="Source not found")
-    fetcherManager.stop_source(source_id) # Ensure stopped
+    fetcherManager.remove_source(source_id) # Ensure stopped
     return db_source
 
 @router.post("/{source_id}/start")
@@ -15,7 +15,8 @@ class ArticleBase(BaseModel):
     language: Optional[str] = "tr"
 
 class ArticleCreate(ArticleBase):
-    pass
+    simhash: Optional[int] = None
+    canonicalArticleId: Optional[int] = None
 
 class ArticleUpdate(BaseModel):
     title: Optional[str] = None
@@ -27,6 +28,7 @@ class ArticleUpdate(BaseModel):
 
 class ArticleResponse(ArticleBase):
     id: int
+    canonicalArticleId: Optional[int] = None
     createdAt: datetime
     updatedAt: datetime
     images: List[ImageResponse] = []
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, model_validator
 from datetime import datetime
 from typing import Optional
+from etl.image_store import derivative_url
 
 class ImageBase(BaseModel):
     localPath: str
@@ -10,7 +11,7 @@ class ImageBase(BaseModel):
     tags: Optional[str] = None
 
 class ImageCreate(ImageBase):
-    pass
+    contentHash: Optional[str] = None
 
 class ImageUpdate(BaseModel):
     analysis: Optional[str] = None
@@ -19,4 +20,15 @@ class ImageUpdate(BaseModel):
 class ImageResponse(ImageBase):
     id: int
     createdAt: datetime
+    derivativesReady: Optional[bool] = False
+    # Downscaled WebP versions; None until they are generated (fall back to localPath)
+    thumbUrl: Optional[str] = None
+    mediumUrl: Optional[str] = None
     model_config = ConfigDict(from_attributes=True)
+
+    @model_validator(mode="after")
+    def fillDerivativeUrls(self):
+        if self.derivativesReady:
+            self.thumbUrl = derivative_url(self.localPath, "thumb")
+            self.mediumUrl = derivative_url(self.localPath, "medium")
+        return self
@@ -28,6 +28,11 @@ class SourceUpdate(BaseModel):
 class SourceResponse(SourceBase):
     id: int
     lastFetchTime: Optional[datetime] = None
+    effectiveIntervalMinutes: Optional[float] = None
+    consecutiveFailures: Optional[int] = 0
+    nextRetryTime: Optional[datetime] = None
+    lastError: Optional[str] = None
+    leaseOwner: Optional[str] = None        # instance polling it right now
     createdAt: datetime
     updatedAt: datetime
     # Config to allow reading from ORM (SQLAlchemy) objects
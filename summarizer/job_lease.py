@@ -0,0 +1,69 @@
+import os
+import threading
+
+from model.base import ConfigSessionLocal
+from crud.job import renewJobLease, reapExpiredJobs
+from crud.article import promoteStrandedDuplicates, syncDuplicateSummaries
+
+# A claimed job is leased to its worker for JOB_LEASE_SECONDS and the lease is
+# renewed while the LLM call runs. If the worker dies the lease runs out and the
+# reaper puts the job back in the queue, so nothing stays PROCESSING forever.
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+JOB_MAX_RETRIES = int(os.getenv("JOB_MAX_RETRIES", "3"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "60"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "3600"))
+JOB_REAPER_INTERVAL_SECONDS = float(os.getenv("JOB_REAPER_INTERVAL_SECONDS", "60"))
+# Leader lease name: the app and every summarizer process can host the reaper, one runs it
+JOB_REAPER_LEASE = "job-reaper"
+
+def retry_delay(retries: int) -> float:
+    """Seconds before a job that failed `retries` times may be claimed again."""
+    return min(JOB_RETRY_BASE_SECONDS * 2 ** max(retries - 1, 0), JOB_RETRY_MAX_SECONDS)
+
+class JobHeartbeat:
+    """`with JobHeartbeat(job.id, workerId):` keeps renewing the job's lease until the block ends."""
+    def __init__(self, jobId: int, workerId: str, leaseSeconds: float = JOB_LEASE_SECONDS):
+        self._jobId = jobId
+        self._workerId = workerId
+        self._leaseSeconds = leaseSeconds
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop_event.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop_event.wait(self._leaseSeconds / 3):
+            db = ConfigSessionLocal()
+            try:
+                if not renewJobLease(db, self._jobId, self._workerId, self._leaseSeconds):
+                    print(f"Job {self._jobId}: lease lost, it may be picked up again")
+                    return
+            except Exception as e:
+                print(f"Job {self._jobId}: heartbeat failed: {e}")
+            finally:
+                db.close()
+
+def reap_stuck_jobs():
+    """
+    Leader job (see etl/leader.py): requeues jobs whose worker stopped heartbeating,
+    and makes sure near-duplicates don't wait on a summary that will never come.
+    """
+    db = ConfigSessionLocal()
+    try:
+        requeued, failed = reapExpiredJobs(db, JOB_MAX_RETRIES, retry_delay, JOB_LEASE_SECONDS)
+        # Covers the jobs just failed above as well as canonicals that FAILED earlier
+        promoted = len(promoteStrandedDuplicates(db))
+        synced = syncDuplicateSummaries(db)
+    finally:
+        db.close()
+    if requeued or failed:
+        print(f"Reaper: {requeued} stuck jobs requeued, {len(failed)} marked FAILED")
+    if promoted or synced:
+        print(f"Reaper: {promoted} near-duplicates promoted to canonical, {synced} given their canonical's summary")
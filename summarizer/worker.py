@@ -1,19 +1,115 @@
 import time
 import os
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
 from model.base import ConfigSessionLocal, TodaySessionLocal
-from crud.job import getNextJob, markJobCompleted, incrementJobRetry, markJobFailed
-from crud.article import getArticleByUrl, updateArticle
+from crud.job import getNextJob, claimJobs, markJobCompleted, incrementJobRetry, markJobFailed
+from etl.leader import INSTANCE_ID, LeaderJob
+from core.notify import PgListener, JOB_CHANNEL
+from summarizer.job_lease import (
+    JobHeartbeat, reap_stuck_jobs, retry_delay,
+    JOB_LEASE_SECONDS, JOB_MAX_RETRIES, JOB_REAPER_INTERVAL_SECONDS, JOB_REAPER_LEASE
+)
+from crud.article import getArticleByUrl, updateArticle, propagateSummary, promoteDuplicateOfUrl
+from crud.summary_cache import getCachedSummary, saveCachedSummary
 from schema.article import ArticleUpdate
 
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434/v1")
 LLM_MODEL = os.getenv("LLM_MODEL", "qwen2")
 # Configurable Language
 SUMMARY_LANGUAGE = os.getenv("SUMMARY_LANGUAGE", "Turkish") 
+# Idle workers wait for a NOTIFY from addJob/bulkAddJobs; this is only the safety net
+# (and when jobs whose retry backoff ran out get picked up)
+WORKER_IDLE_POLL_SECONDS = float(os.getenv("WORKER_IDLE_POLL_SECONDS", "60"))
+# Jobs summarized at once; set it to the Ollama server's OLLAMA_NUM_PARALLEL.
+# 1 is the old one-job-at-a-time loop.
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", os.getenv("OLLAMA_NUM_PARALLEL", "1")))
+# Summaries are cached by content hash + model + PROMPT_VERSION; bump the version
+# whenever the prompt below changes so old summaries aren't reused
+SUMMARY_CACHE_ENABLED = os.getenv("SUMMARY_CACHE_ENABLED", "true").lower() == "true"
+PROMPT_VERSION = "1"
+# LLM latency and cache stats are printed every this many requests/lookups
+SUMMARY_STATS_EVERY = int(os.getenv("SUMMARY_STATS_EVERY", "20"))
 
 client = OpenAI(base_url=OLLAMA_BASE_URL, api_key="ollama")
+# Stuck-job reaper; runs in whichever app/worker process holds the lease
+jobReaper = LeaderJob(JOB_REAPER_LEASE, JOB_REAPER_INTERVAL_SECONDS, reap_stuck_jobs)
+
+class LatencyStats:
+    """Thread-safe LLM request latencies over the last `window` calls."""
+    def __init__(self, window: int = 500):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.requests = 0
+        self.failures = 0
+
+    def record(self, seconds: float, ok: bool):
+        with self._lock:
+            self._latencies.append(seconds)
+            self.requests += 1
+            if not ok:
+                self.failures += 1
+            report = SUMMARY_STATS_EVERY > 0 and self.requests % SUMMARY_STATS_EVERY == 0
+        if report:
+            print(f"LLM stats: {self.summary()}")
+
+    def summary(self) -> str:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            requests, failures = self.requests, self.failures
+        if not latencies:
+            return "no requests yet"
+        pick = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)]
+        return (
+            f"{requests} requests ({failures} failed), last {len(latencies)}: "
+            f"avg {sum(latencies) / len(latencies):.1f}s p50 {pick(0.5):.1f}s "
+            f"p95 {pick(0.95):.1f}s max {latencies[-1]:.1f}s"
+        )
+
+latencyStats = LatencyStats()
+
+class HitRatio:
+    """Thread-safe hit/lookup counter for the summary cache."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+
+    def record(self, hit: bool):
+        with self._lock:
+            self.lookups += 1
+            if hit:
+                self.hits += 1
+            report = SUMMARY_STATS_EVERY > 0 and self.lookups % SUMMARY_STATS_EVERY == 0
+        if report:
+            print(f"Summary cache: {self.summary()}")
+
+    def summary(self) -> str:
+        with self._lock:
+            hits, lookups = self.hits, self.lookups
+        return f"{hits}/{lookups} hits ({hits / lookups:.0%})" if lookups else "no lookups yet"
+
+cacheStats = HitRatio()
+
+_SPACES = re.compile(r"\s+")
+
+def summary_key(content: str) -> str:
+    """Cache key: same text (modulo Unicode form and whitespace) + same model + same prompt."""
+    normalized = _SPACES.sub(" ", unicodedata.normalize("NFC", content or "")).strip()
+    return hashlib.sha256(f"{LLM_MODEL}\n{PROMPT_VERSION}\n{normalized}".encode("utf-8")).hexdigest()
 
 def summarize_text(text: str) -> str:
+    started = time.perf_counter()
+    summary = _complete(text)
+    latencyStats.record(time.perf_counter() - started, summary is not None)
+    return summary
+
+def _complete(text: str) -> str:
     try:
         response = client.chat.completions.create(
             model=LLM_MODEL,
@@ -39,56 +135,148 @@ def summarize_text(text: str) -> str:
         print(f"LLM Error: {e}")
         return None
 
+def process_job(job):
+    """Summarizes one claimed job and completes / requeues it. Sessions are not held during the LLM call."""
+    print(f"Processing Job {job.id} for {job.articleUrl}")
+
+    configDb = ConfigSessionLocal()
+    todayDb = TodaySessionLocal()
+    try:
+        article = getArticleByUrl(todayDb, job.articleUrl)
+        if not article:
+            print("Article not found in TodayDB or moved. Deleting Job.")
+            markJobCompleted(configDb, job.id)
+            return
+        articleId, content = article.id, article.content
+
+        # Republished URLs / syndicated copies with the exact same text skip the LLM
+        summary = cacheKey = None
+        if SUMMARY_CACHE_ENABLED:
+            cacheKey = summary_key(content)
+            summary = getCachedSummary(todayDb, cacheKey)
+            cacheStats.record(summary is not None)
+    finally:
+        configDb.close()
+        todayDb.close()
+
+    if summary:
+        print(f"Job {job.id}: summary cache hit")
+    else:
+        # The LLM call can outlast the lease, so keep renewing it meanwhile
+        with JobHeartbeat(job.id, INSTANCE_ID):
+            summary = summarize_text(content)
+        if summary and cacheKey:
+            todayDb = TodaySessionLocal()
+            try:
+                saveCachedSummary(todayDb, cacheKey, summary, LLM_MODEL)
+            except Exception as e:
+                print(f"Could not cache summary of job {job.id}: {e}")
+            finally:
+                todayDb.close()
+
+    configDb = ConfigSessionLocal()
+    todayDb = TodaySessionLocal()
+    try:
+        if summary:
+            updateArticle(todayDb, articleId, ArticleUpdate(
+                isSummarized=True,
+                summary=summary
+            ))
+            # Near-duplicates linked to this article get the same summary
+            copies = propagateSummary(todayDb, articleId, summary)
+            if copies:
+                print(f"Summary copied to {copies} near-duplicate articles.")
+            markJobCompleted(configDb, job.id)
+            print(f"Job {job.id} complete.")
+        else:
+            # Retry Logic
+            print(f"Job {job.id} failed to summarize.")
+            attempts = incrementJobRetry(configDb, job.id, retry_delay((job.retryCount or 0) + 1))
+            print(f"Retry count: {attempts}")
+            
+            if attempts >= JOB_MAX_RETRIES:
+                 print(f"Job {job.id} exceeded max retries. Marking FAILED.")
+                 markJobFailed(configDb, job.id)
+                 # Its near-duplicates were waiting on this summary
+                 promoted = promoteDuplicateOfUrl(todayDb, job.articleUrl)
+                 if promoted:
+                     print(f"Near-duplicate {promoted} queued for its own summary.")
+    finally:
+        configDb.close()
+        todayDb.close()
+
 def run_summary_worker(run_once=False):
-    print(f"Summarizer Worker started (Language: {SUMMARY_LANGUAGE})...")
+    print(f"Summarizer Worker started (Language: {SUMMARY_LANGUAGE}, {SUMMARY_CONCURRENCY} at a time)...")
+    jobReaper.start()
+    if SUMMARY_CONCURRENCY > 1 and not run_once:
+        return run_concurrent_worker(SUMMARY_CONCURRENCY)
+
+    listener = None if run_once else PgListener(JOB_CHANNEL)
     while True:
-        configDb = ConfigSessionLocal()
-        todayDb = TodaySessionLocal()
-        
         try:
-            job = getNextJob(configDb)
+            configDb = ConfigSessionLocal()
+            try:
+                job = getNextJob(configDb, INSTANCE_ID, JOB_LEASE_SECONDS)
+            finally:
+                configDb.close()
             if not job:
                 if run_once: break
-                time.sleep(5) 
-                continue
-
-            print(f"Processing Job {job.id} for {job.articleUrl}")
-            
-            article = getArticleByUrl(todayDb, job.articleUrl)
-            if not article:
-                print("Article not found in TodayDB or moved. Deleting Job.")
-                markJobCompleted(configDb, job.id)
+                listener.wait(WORKER_IDLE_POLL_SECONDS)
                 continue
 
-            summary = summarize_text(article.content)
-            
-            if summary:
-                updateArticle(todayDb, article.id, ArticleUpdate(
-                    isSummarized=True,
-                    summary=summary
-                ))
-                markJobCompleted(configDb, job.id)
-                print(f"Job {job.id} complete.")
-            else:
-                # Retry Logic
-                print(f"Job {job.id} failed to summarize.")
-                attempts = incrementJobRetry(configDb, job.id)
-                print(f"Retry count: {attempts}")
-                
-                if attempts >= 3:
-                     print(f"Job {job.id} exceeded max retries. Marking FAILED.")
-                     markJobFailed(configDb, job.id)
-                
-                time.sleep(5)
-            
+            process_job(job)
             if run_once: break # Processed one job, then exit
 
         except Exception as e:
             print(f"Worker Loop Error: {e}")
             time.sleep(5)
+
+def run_concurrent_worker(concurrency: int):
+    """
+    Keeps up to `concurrency` jobs in flight on a thread pool (the LLM call is
+    blocking I/O, so threads are enough). Free slots are filled with one
+    claimJobs batch; when the queue is empty it waits for a NOTIFY.
+    """
+    listener = PgListener(JOB_CHANNEL)
+    pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="summary")
+    slots = threading.Condition()
+    in_flight = 0
+
+    def _run(job):
+        nonlocal in_flight
+        try:
+            process_job(job)
+        except Exception as e:
+            print(f"Job {job.id} error: {e}")
         finally:
-            configDb.close()
-            todayDb.close()
+            with slots:
+                in_flight -= 1
+                slots.notify()
+
+    while True:
+        with slots:
+            while in_flight >= concurrency:
+                slots.wait()
+            free = concurrency - in_flight
+
+        try:
+            configDb = ConfigSessionLocal()
+            try:
+                jobs = claimJobs(configDb, free, INSTANCE_ID, JOB_LEASE_SECONDS)
+            finally:
+                configDb.close()
+        except Exception as e:
+            print(f"Worker Loop Error: {e}")
+            time.sleep(5)
+            continue
+
+        if not jobs:
+            listener.wait(WORKER_IDLE_POLL_SECONDS)
+            continue
+        with slots:
+            in_flight += len(jobs)
+        for job in jobs:
+            pool.submit(_run, job)
 
 if __name__ == "__main__":
-    run_worker()
\ No newline at end of file
+    run_summary_worker()
@@ -0,0 +1,98 @@
+import pytest
+
+from etl.extractor import extract_bs4, extract_lxml, check_parity
+
+# Both engines must give identical (text, image srcs, selector) for the same page.
+# Pages are small but cover what the two engines handle differently.
+
+BODY_TEXT = "Belediye meclisi bugün yeni ulaşım planını oyladı ve kabul etti."
+
+def page(body: str, head: str = '<meta charset="utf-8">') -> str:
+    return f"<html><head>{head}<title>Haber</title></head><body>{body}</body></html>"
+
+PAGES = {
+    "article_with_junk": page(f"""
+        <header><p>Site başlığı ve menü bağlantıları burada</p></header>
+        <article>
+          <h2>İstanbul'da yeni metro hattı açıldı bugün</h2>
+          <p>{BODY_TEXT}</p>
+          <div class="share-buttons"><p>Bu haberi sosyal medyada paylaşın lütfen</p></div>
+          <div id="Related-News"><p>İlgili haberler listesi burada yer alıyor</p></div>
+          <p>Haberi devamı için tıklayınız, detaylar yakında eklenecek</p>
+          <script>var x = "<p>script içindeki metin görünmemeli</p>";</script>
+          <aside><p>Kenar çubuğundaki reklam metni görünmemeli</p></aside>
+          <img src="/img/lead.jpg"><img src="/img/site-logo.png">
+        </article>"""),
+    "comments_and_tails": page(f"""
+        <div class="news-detail">
+          <p>Açılış töreninde <b>bakan</b> <!-- yorum metni görünmemeli --> konuştu ve <i>proje</i> detaylarını anlattı.</p>
+          <p>{BODY_TEXT} <span class="social">paylaş</span> sonrası metin devam ediyor.</p>
+          <ul><li>Birinci madde yeterince uzun bir metin içeriyor</li><li>kısa</li></ul>
+        </div>"""),
+    "data_src_images": page(f"""
+        <div id="article-body">
+          <p>{BODY_TEXT}</p>
+          <img data-src="https://cdn.example.com/a.jpg">
+          <img src="https://cdn.example.com/b.webp" data-src="https://cdn.example.com/b-large.webp">
+          <img src="/icons/share-icon.svg">
+          <img>
+        </div>"""),
+    "no_container": page(f"""
+        <div class="wrapper"><p>{BODY_TEXT}</p><p>12/05/2024 14:30 tarihinde güncellendi</p>
+        <p>#etiket ile başlayan satır atlanmalı, uzun olsa bile</p></div>"""),
+}
+
+CHARSET_PAGES = {
+    # Turkish letters that differ between windows-1254 and latin-1 (ş, ğ, İ, ı)
+    "windows-1254": page(
+        "<article><p>Şirket genel müdürü Ağrı'daki İş fuarında konuştu ve ılık karşılandı.</p></article>",
+        head='<meta http-equiv="Content-Type" content="text/html; charset=windows-1254">',
+    ),
+    "iso-8859-9": page(
+        "<article><p>Öğrenciler sınav sonuçlarını öğrenmek için çağrı merkezini aradı.</p></article>",
+        head='<meta charset="iso-8859-9">',
+    ),
+}
+
+# Broken markup the two parsers repair differently (documented in extract_lxml).
+# strict: if an engine change makes them agree, drop the case from here.
+KNOWN_DIFFERENCES = {
+    "unclosed_p": page(f"<article><p>{BODY_TEXT}<p>Muhalefet partileri plana karşı oy kullandı dün.</article>"),
+    "unclosed_li": page(f"<article><ul><li>{BODY_TEXT}<li>Muhalefet partileri plana karşı oy kullandı dün.</ul></article>"),
+    "div_in_p": page(f"<article><p>{BODY_TEXT}<div>Muhalefet partileri plana karşı oy kullandı.</div> ve metin burada devam ediyor</p></article>"),
+}
+
+@pytest.mark.parametrize("name", sorted(PAGES))
+def test_engines_match(name):
+    same, reference, fast = check_parity(PAGES[name].encode("utf-8"), "https://example.com/haber")
+    assert same, (reference, fast)
+    assert reference[0]  # the page actually produced text
+
+@pytest.mark.parametrize("charset", sorted(CHARSET_PAGES))
+def test_engines_match_non_utf8(charset):
+    content = CHARSET_PAGES[charset].encode(charset)
+    # Charset from the meta tag, and from the HTTP header
+    for encoding in (None, charset):
+        reference = extract_bs4(content, "", encoding)
+        assert extract_lxml(content, "", encoding) == reference
+        assert "ş" in reference[0] or "ğ" in reference[0]
+
+@pytest.mark.parametrize("name", sorted(PAGES))
+def test_engines_match_with_hint(name):
+    content = PAGES[name].encode("utf-8")
+    for hint in ("article", "class:content", "id:article-body", "body"):
+        assert extract_bs4(content, "", None, hint) == extract_lxml(content, "", None, hint)
+
+@pytest.mark.xfail(strict=True, reason="html.parser and libxml2 build different trees from broken markup")
+@pytest.mark.parametrize("name", sorted(KNOWN_DIFFERENCES))
+def test_engines_match_broken_markup(name):
+    same, reference, fast = check_parity(KNOWN_DIFFERENCES[name].encode("utf-8"))
+    assert same, (reference, fast)
+
+@pytest.mark.parametrize("name", sorted(KNOWN_DIFFERENCES))
+def test_broken_markup_keeps_first_paragraph(name):
+    # Whatever the split, neither engine loses the paragraph before the broken tag
+    for engine in (extract_bs4, extract_lxml):
+        text, srcs, selector = engine(KNOWN_DIFFERENCES[name].encode("utf-8"), "")
+        assert text.startswith(BODY_TEXT)
+        assert selector == "article"
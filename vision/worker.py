@@ -7,11 +7,14 @@ from PIL import Image as PILImage  # Requires: pip install Pillow
 from model.base import ConfigSessionLocal
 from model.image import Image
 from sqlalchemy.orm import Session
+from core.notify import PgListener, IMAGE_CHANNEL
 
 # Models
 VISION_MODEL = "llava"       # Best for looking
 TEXT_MODEL = "qwen2"         # Best for speaking/translating (adjusted to installed model)
 MAX_RETRIES = 3
+# Idle wait between checks; new images wake the worker right away via NOTIFY
+WORKER_IDLE_POLL_SECONDS = float(os.getenv("WORKER_IDLE_POLL_SECONDS", "60"))
 
 def convert_to_jpg(image_path: str) -> str:
     """Converts image to a temporary JPG file via Pillow. Returns temp file path."""
@@ -104,11 +107,23 @@ def analyze_image(image_path: str):
         if temp_path and os.path.exists(temp_path):
             os.remove(temp_path)
 
+def find_analyzed_twin(db: Session, img: Image):
+    """An already analyzed image with the same bytes, whose analysis can be reused."""
+    if not img.contentHash:
+        return None
+    return db.query(Image).filter(
+        Image.contentHash == img.contentHash,
+        Image.isAnalyzed == True,
+        Image.id != img.id,
+        ~Image.analysis.like("Error:%")
+    ).first()
+
 def run_vision_worker(run_once=False):
     print(f"Vision Worker started.")
     print(f"  - Vision: {VISION_MODEL}")
     print(f"  - Text:   {TEXT_MODEL}")
     
+    listener = None if run_once else PgListener(IMAGE_CHANNEL)
     while True:
         db = ConfigSessionLocal()
         found_job = False
@@ -118,13 +133,25 @@ def run_vision_worker(run_once=False):
             
             if not images:
                 if run_once: break # Exit if no work
-                time.sleep(10)
+                db.close()
+                listener.wait(WORKER_IDLE_POLL_SECONDS)
                 continue
                 
             found_job = True
             for img in images:
                 print(f"Processing Image {img.id} ({img.localPath})...")
                 
+                # Same blob already analyzed for another article? Reuse it.
+                twin = find_analyzed_twin(db, img)
+                if twin:
+                    print(f"  > Reusing analysis of Image {twin.id} (same content)")
+                    img.analysis = twin.analysis
+                    img.tags = twin.tags
+                    img.isAnalyzed = True
+                    db.commit()
+                    if run_once: break
+                    continue
+
                 # Check file existence
                 if not os.path.exists(img.localPath):
                     print(f"File missing: {img.localPath}. Skipping.")
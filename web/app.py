@@ -6,6 +6,7 @@ from fastapi.middleware.cors import CORSMiddleware
 
 # Import Routers
 from route import home, source, user, auth, article
+from core.metrics import metrics
 
 app = FastAPI(title="Muhabir", version="0.0.1")
 
@@ -46,4 +47,8 @@ app.include_router(article.router)
 
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+@app.get("/metrics")
+def get_metrics():
+    return metrics.snapshot()
\ No newline at end of file